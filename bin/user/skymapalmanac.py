@@ -37,6 +37,8 @@ VERSION="0.6"
 
 import time
 import os.path
+import math
+import functools
 import configobj
 # `pathlib` is required for `get_lang_dict`
 from pathlib import Path
@@ -60,9 +62,11 @@ except (ImportError,PermissionError):
     from skyfield.sgp4lib import EarthSatellite
     from skyfield.starlib import Star
     from skyfield.units import Angle
-from skyfield.constants import DAY_S, DEG2RAD, RAD2DEG
+from skyfield.constants import DAY_S, DEG2RAD, RAD2DEG, C_AUDAY
+from skyfield.functions import length_of
+from skyfield.nutationlib import iau2000b_radians
 from skyfield.magnitudelib import planetary_magnitude
-from skyfield.positionlib import position_of_radec
+from skyfield.positionlib import position_of_radec, ICRF, Astrometric
 from skyfield.trigonometry import position_angle_of
 from skyfield.framelib import ecliptic_frame
 import skyfield.almanac
@@ -82,6 +86,20 @@ def loginf(msg):
 def logerr(msg):
     log.error(msg)
 
+# radius of Sun and Moon times RAD2DEG
+# (divided by the distance in km that is the apparent radius in degrees)
+SUN_RADIUS_FACTOR = user.skyfieldalmanac.SUN_RADIUS_KM*RAD2DEG
+MOON_RADIUS_FACTOR = user.skyfieldalmanac.MEAN_MOON_RADIUS_KM*RAD2DEG
+
+# NAIF codes of the bodies Skyfield can calculate the magnitude of
+# (planets and their barycenters, see `skyfield.magnitudelib`)
+MAGNITUDE_TARGETS = {1,2,4,5,6,7,8,199,299,499,599,699,799,899}
+
+@functools.lru_cache(maxsize=32)
+def radius_factor(body):
+    """ radius of a planet times RAD2DEG, see `SUN_RADIUS_FACTOR` """
+    return user.skyfieldalmanac.SIZES[body.split('_')[0]][0]*RAD2DEG
+
 def _get_config(config_dict):
     """ get almanac configuration """
     conf_dict = config_dict.get('Almanac',configobj.ConfigObj(interpolation=False))
@@ -95,6 +113,8 @@ def _get_config(config_dict):
     return alm_conf_dict
 
 def to_bool(x, valid_strings=()):
+    # Values from the templates and the defaults are mostly bool already.
+    if x is True or x is False: return x
     if x in valid_strings: return x
     return weeutil.weeutil.to_bool(x)
 
@@ -107,6 +127,270 @@ def to_int(x):
         x = weeutil.weeutil.to_int(x)
     return x
 
+@functools.lru_cache(maxsize=8)
+def _get_station(lat, lon, altitude):
+    """ geographic position of the station """
+    return wgs84.latlon(lat,lon,elevation_m=altitude)
+
+@functools.lru_cache(maxsize=8)
+def _get_observer(earth, lat, lon, altitude):
+    """ topocentric observer """
+    return earth + _get_station(lat,lon,altitude)
+
+@functools.lru_cache(maxsize=16)
+def _apparent_positions(observer, time_ts):
+    """ apparent positions of heavenly bodies seen by `observer` at `time_ts`
+    
+        Returns an empty dict for a new combination of observer and
+        timestamp, and the same dict on subsequent calls. The caller
+        fills it with the apparent positions indexed by the ephemeris
+        object. So a report containing more than one map of the same
+        time and place calculates the positions only once. As the Earth
+        ephemeris is part of the observer and the body ephemeris is the
+        key, reloaded ephemerides do not result in outdated positions.
+    """
+    return dict()
+
+def low_precision_time(t):
+    """ use the IAU2000B nutation model for the time object `t`
+    
+        Skyfield uses the full IAU2000A model by default, which evaluates
+        1365 terms for every element of `t`. IAU2000B differs by about
+        1 milliarcsecond only, which cannot be seen in a diagram.
+        The series of times used to draw paths and circles on the maps
+        are large arrays, so it makes a difference for them.
+        
+        `t` is changed in place. So it must be a time object this module
+        created and does not share with the Skyfield almanac.
+    """
+    t._nutation_angles_radians = iau2000b_radians(t)
+    return t
+
+@functools.lru_cache(maxsize=16)
+def skyfield_time(time_ts):
+    """ get the Skyfield time object for the timestamp `time_ts`
+    
+        Sky map, zodiac map and Moon symbol of the same report use the
+        same timestamp. So they share the time object, including the
+        rotation matrices Skyfield caches within it. The maps use the
+        IAU2000B nutation model like for the paths and circles. That
+        is set on a copy, as the Skyfield almanac might share its own
+        time object.
+    """
+    t = user.skyfieldalmanac.timestamp_to_skyfield_time(time_ts)
+    return low_precision_time(t.ts.tt_jd(t.whole,t.tt_fraction))
+
+@functools.lru_cache(maxsize=4)
+def days_of_year(time_ti):
+    """ 365 days starting at `time_ti` as one Skyfield time object
+    
+        The analemma changes only if the time of day changes. So the
+        time object, including the rotation matrices Skyfield caches
+        within it, is re-used.
+    """
+    return low_precision_time(user.skyfieldalmanac.ts.ut1_jd([time_ti.ut1+i for i in range(365)]))
+
+@functools.lru_cache(maxsize=4)
+def seasons(ephemerides, t0, t1):
+    """ equinoxes and solstices between `t0` and `t1`
+    
+        Searching them is the most expensive part of the analemma, but
+        the result is the same for the whole year.
+    """
+    return skyfield.almanac.find_discrete(t0,t1,skyfield.almanac.seasons(ephemerides))
+
+@functools.lru_cache(maxsize=16)
+def observer_position(observer, time_ti):
+    """ position of the topocentric observer at time `time_ti`
+    
+        All the parts of a map need the position of the observer at
+        the same time, and so do the other maps and the Moon symbol of
+        the same report, as they share the observer and the time object.
+        So it is calculated once only.
+    """
+    return observer.at(time_ti)
+
+def apparent_position(observer, time_ti, body, time_ts):
+    """ apparent position of `body`, calculated once per place and time
+    
+        The Sun is required for the background color and the Moon symbol
+        as well as for drawing it, the Moon for the map and the Moon
+        symbol. They share the result by means of `_apparent_positions()`.
+    """
+    cache = _apparent_positions(observer,round(time_ts))
+    apparent = cache.get(body)
+    if apparent is None:
+        apparent = observer_position(observer,time_ti).observe(body).apparent()
+        cache[body] = apparent
+    return apparent
+
+@functools.lru_cache(maxsize=16)
+def _moon_phase(ephemerides, time_ts):
+    """ phase angle of the Moon at `time_ts`
+    
+        This is the same as `skyfield.almanac.moon_phase()`, but with
+        one iteration of the light-time correction only, see
+        `astrometric_position()`.
+    """
+    earth_at = ephemerides['earth'].at(skyfield_time(time_ts))
+    _, sun_lon, _ = astrometric_position(earth_at,ephemerides['sun']).apparent().frame_latlon(ecliptic_frame)
+    _, moon_lon, _ = astrometric_position(earth_at,ephemerides['moon']).apparent().frame_latlon(ecliptic_frame)
+    return Angle(radians=(moon_lon.radians-sun_lon.radians)%(2.0*math.pi))
+
+def moon_phase(almanac_obj):
+    """ get the phase angle of the Moon at the time of `almanac_obj`
+    
+        The sky map and the Moon symbol both show the phase of the Moon.
+        The timestamp is rounded to 1 second, so they share the result.
+    """
+    return _moon_phase(user.skyfieldalmanac.sun_and_planets,round(almanac_obj.time_ts))
+
+# stars selected out of the catalogue, see `selected_stars()`
+_selected_stars = dict()
+
+def selected_stars(df, max_magnitude):
+    """ stars of the catalogue `df` up to magnitude `max_magnitude`
+    
+        Filtering the catalogue and creating the `Star` object takes
+        some time, but the magnitude limit is a configuration value.
+        So it is done once per limit, not for every map. The catalogue
+        is part of the cached value, so a reloaded catalogue results
+        in a new selection.
+        
+        Returns:
+            tuple: `Star` object, magnitudes (numpy.array), Hipparcos
+                catalogue numbers (list)
+    """
+    entry = _selected_stars.get(max_magnitude)
+    if entry is None or entry[0] is not df:
+        df_selected = df[df['magnitude']<=max_magnitude]
+        entry = (
+            df,
+            Star.from_dataframe(df_selected),
+            df_selected['magnitude'].to_numpy(),
+            df_selected.index.tolist()
+        )
+        _selected_stars[max_magnitude] = entry
+    return entry[1:]
+
+def astrometric_position(observer_at, body):
+    """ astrometric position of `body` seen from `observer_at`
+    
+        This is the same as `observer_at.observe(body)`, but with one
+        iteration of the light-time correction only. Skyfield iterates
+        until the light time changes less than 1e-12 days, which requires
+        some more evaluations of the ephemeris. After the first iteration
+        the remaining error is about 1/10000 of the displacement due to
+        light time, which is far below what can be seen on a map.
+    """
+    if getattr(body,'center',None)!=0:
+        # not relative to the solar system barycenter or no vector
+        # function at all (Skyfield handles it or raises the appropriate
+        # exception)
+        return observer_at.observe(body)
+    t = observer_at.t
+    position = observer_at.position.au
+    light_time = length_of(body.at(t).position.au-position)/C_AUDAY
+    target = body.at(t.ts.tdb_jd(t.whole,t.tdb_fraction-light_time))
+    p = target.position.au-position
+    astrometric = Astrometric(p,target.velocity.au_per_d-observer_at.velocity.au_per_d,t,observer_at.target,body.target)
+    astrometric._ephemeris = observer_at._ephemeris
+    astrometric.center_barycentric = observer_at
+    astrometric.light_time = length_of(p)/C_AUDAY
+    return astrometric
+
+def geometric_altaz(rotation, positions):
+    """ convert position vectors into horizontal coordinates
+
+        This does the same as `frame_latlon()` of Skyfield, but for
+        many vectors at once. There is no refraction and no aberration.
+        That is accurate enough to decide whether a body is above the
+        horizon or not.
+
+        Args:
+            rotation(numpy.array): 3x3 rotation matrix of the station
+            positions(numpy.array): 3xN array of position vectors
+
+        Returns:
+            tuple: altitudes in degrees, azimuths in radians, distances
+    """
+    x, y, z = numpy.dot(rotation, positions)
+    dist = numpy.sqrt(x*x+y*y+z*z)
+    alt = numpy.arcsin(z/dist)*RAD2DEG
+    az = numpy.arctan2(y,x)%(2*numpy.pi)
+    return alt, az, dist
+
+def polyline(xx, yy):
+    """ SVG path data of a line through the points (xx[i], yy[i]) """
+    # (Python floats are formatted faster than numpy scalars.)
+    xx = numpy.asarray(xx).tolist()
+    yy = numpy.asarray(yy).tolist()
+    return 'M%.4f,%.4f%s' % (xx[0],yy[0],''.join('L%.4f,%.4f' % xy for xy in zip(xx[1:],yy[1:])))
+
+@functools.lru_cache(maxsize=128)
+def satellite_short_label(name):
+    """ short label of an Earth satellite out of its name
+    
+        GPS, Galileo and Meteosat satellites are labeled by their number.
+        The names do not change, so they are parsed once only.
+    """
+    short_label = name
+    if name.startswith('GPS ') and '(PRN' in name:
+        i = name.find('(PRN')
+        if i>=0:
+            short_label = name[i+4:].split(')')[0].strip()
+    elif '(GALILEO' in name:
+        i = name.find('(GALILEO')
+        if name[i+8]=='-': i += 1
+        short_label = name[i+8:].split(')')[0].strip()
+    elif name.startswith('METEOSAT-'):
+        i = name.find('(MSG-')
+        short_label = name[i+5:].split(')')[0].strip()
+    return short_label
+
+def get_station(almanac_obj):
+    """ get the geographic position of the station
+    
+        The location of a WeeWX station does not change very often. So the
+        object is created once and then re-used. Latitude and longitude are
+        rounded to about 0.1 m to avoid cache misses caused by floating
+        point noise.
+    """
+    return _get_station(
+        round(almanac_obj.lat,6),
+        round(almanac_obj.lon,6),
+        round(almanac_obj.altitude,1)
+    )
+
+def get_observer(almanac_obj):
+    """ get the topocentric observer at the location of the station
+    
+        The Earth ephemeris is part of the cache key, so a reloaded 
+        ephemeris file results in a new observer.
+    """
+    return _get_observer(
+        user.skyfieldalmanac.ephemerides['earth'],
+        round(almanac_obj.lat,6),
+        round(almanac_obj.lon,6),
+        round(almanac_obj.altitude,1)
+    )
+
+@functools.lru_cache(maxsize=8)
+def latlon_strings(lat, lon, formatter, converter):
+    """ formatted latitude and longitude of the station without sign
+    
+        The sky map and the diagrams all show the location of the
+        station. It does not change, so the value helpers are created
+        once for each combination of location, formatter, and converter.
+        
+        Returns:
+            tuple: latitude (8 characters wide), longitude (8 digits
+                including leading zeros), both including the unit label
+    """
+    lat_vt = ValueHelper(ValueTuple(abs(lat),'degree_compass','group_direction'),'current',formatter=formatter,converter=converter)
+    lon_vt = ValueHelper(ValueTuple(abs(lon),'degree_compass','group_direction'),'current',formatter=formatter,converter=converter)
+    return lat_vt.format("%8.4f"), lon_vt.format("%08.4f")
+
 def timezone_name(t, abbreviated=True, labels={'TZ':dict()}):
     """ get the timezone name
     
@@ -170,19 +454,32 @@ class SkymapAlmanacType(weewx.almanac.AlmanacType):
         """
         # The attribute `texts` is available from WeeWX 5.3 on. For WeeWX 5.2
         # use an empty dict.
-        alm_dict = almanac_obj.texts if 'texts' in almanac_obj.__dict__ else dict()
+        alm_dict = almanac_obj.texts if 'texts' in almanac_obj.__dict__ else None
         # The `texts` attribute is the `[Almanac]` section of the skin's
         # configuration dict including the chosen language file. It is 
         # created once per report. So it is enough to process it here
         # once per report. We recognize the next report by the `texts` 
-        # attribute being not the same as before.
-        if self.last_texts is alm_dict:
-            return self.last_labels
+        # attribute being not the same as before. WeeWX 5.2 has no
+        # `texts` attribute. Then the labels depend on the language
+        # found by the word for the new moon and on the planet names
+        # only. So these values are compared instead.
+        if alm_dict is not None:
+            if self.last_texts is alm_dict:
+                return self.last_labels
+            last_texts = alm_dict
+        else:
+            last_texts = (
+                almanac_obj.moon_phases[0],
+                tuple(almanac_obj.__dict__.get('planet_names') or ())
+            )
+            if isinstance(self.last_texts,tuple) and self.last_texts==last_texts:
+                return self.last_labels
+            alm_dict = dict()
         # This is the first call of a new report. So build a new labels
         # dict. First try to get the skin_dict for general labels.
         try:
             skin_dict = alm_dict.parent
-        except AttributeErrror:
+        except AttributeError:
             skin_dict = dict()
         try:
             # If the `texts` attribute is available, which it is from
@@ -264,7 +561,7 @@ class SkymapAlmanacType(weewx.almanac.AlmanacType):
         # logging
         logdbg("Created labels for report '%s', skin '%s' in language '%s'." % (skin_dict.get('REPORT_NAME'),skin_dict.get('SKIN_NAME'),lang))
         # Remember the report by its `texts` attribute and the labels.
-        self.last_texts = alm_dict
+        self.last_texts = last_texts
         self.last_labels = labels
         return labels
 
@@ -285,9 +582,57 @@ class SkymapSubalmanacType(SkymapAlmanacType):
         raise weewx.UnknownType(attr)
 
 
+def _altitude_scale():
+    """ altitude scale of the sky map
+    
+        The scale does not depend on anything but constants. As it is the
+        same for every sky map, it is created once at module load time.
+        The element `<g id="altitude_scale">` is left open for the caller
+        to add the celestial pole and equator.
+    """
+    s = ['<g id="altitude_scale">\n']
+    s.append('<path fill="none" stroke="#808080" stroke-width="0.2" d="M-90,0h180M0,-90v180%s" />\n' %
+        ''.join('M%s,-1.5v3M-1.5,%sh3' % (i*15-75,i*15-75) for i in range(11) if i!=5))
+    # labels of the horizontal and the vertical axis
+    template = (
+        '<text x="%(pos)s" y="6" style="font-size:5px" fill="#808080" text-anchor="middle" dominant-baseline="text-top">%(alt)s&#176;</text>'
+        '<text x="2.5" y="%(pos)s" style="font-size:5px" fill="#808080" text-anchor="start" dominant-baseline="middle">%(alt)s&#176;</text>'
+    )
+    for i in range(11):
+        if i!=5:
+            s.append(template % {'pos':i*15-75,'alt':i*15+15 if i<5 else 165-i*15})
+    return ''.join(s)
+
+
 class SkymapBinder:
     """ SVG map of the sky showing the position of heavenly bodies """
 
+    # static part of the SVG image
+    ALTITUDE_SCALE = _altitude_scale()
+    # directions of the 24 ticks of the azimuth scale
+    AZ24_RAD = numpy.arange(24)*(15*DEG2RAD)
+    SIN_AZ24 = numpy.sin(AZ24_RAD)
+    COS_AZ24 = numpy.cos(AZ24_RAD)
+    # Some labels are slightly shifted to not overlap the ticks.
+    AZ24_LABEL_RAD = AZ24_RAD.copy()
+    AZ24_LABEL_RAD[7] += 1.5*DEG2RAD
+    AZ24_LABEL_RAD[17] -= 1.5*DEG2RAD
+    AZ24_LABEL_RAD[19] += 1.5*DEG2RAD
+    SIN_AZ24_LABEL = numpy.sin(AZ24_LABEL_RAD)
+    COS_AZ24_LABEL = numpy.cos(AZ24_LABEL_RAD)
+    # default colors of heavenly bodies other than white
+    BODY_COLORS = {
+        'mars':'#ff8f5e',
+        'mars_barycenter':'#ff8f5e'
+    }
+    # symbols of heavenly bodies, each one starting the group of the body
+    # together with its tooltip, and the label closing it
+    BODY_SQUARE = '<g id="%s"><title>%s</title>\n<rect x="%.4f" y="%.4f" width="%.4f" height="%.4f" fill="%s" stroke="none" />\n'
+    BODY_RHOMBUS = '<g id="%s"><title>%s</title>\n<path fill="%s" stroke="none" d="M%.4f,%.4fl%.4f,%.4fl%.4f,%.4fl%.4f%.4fz" />\n'
+    BODY_TRIANGLE = '<g id="%s"><title>%s</title>\n<path fill="%s" stroke="none" d="M%.4f,%.4fh%.4fl%.4f,%.4fz" />\n'
+    BODY_CIRCLE = '<g id="%s"><title>%s</title>\n<circle cx="%.4f" cy="%.4f" r="%.2f" fill="%s" stroke="none" />\n'
+    BODY_LABEL = '<text x="%.4f" y="%.4f" font-size="%.2f" fill="#fff" text-anchor="middle" dominant-baseline="middle">%s</text></g>\n'
+
     def __init__(self, config_dict, station_location, almanac_obj, labels):
         self.config_dict = config_dict
         self.credits = '%s %s' % (labels.get('©','&#169;'),station_location)
@@ -394,28 +739,39 @@ class SkymapBinder:
     
     @staticmethod
     def get_observer(almanac_obj):
-        observer = user.skyfieldalmanac.ephemerides['earth'] + wgs84.latlon(almanac_obj.lat,almanac_obj.lon,elevation_m=almanac_obj.altitude)
-        return observer
+        return get_observer(almanac_obj)
     
+    def get_observer_at(self, observer, time_ti):
+        """ position of the observer at time `time_ti` """
+        return observer_position(observer,time_ti)
+
     def to_xy(self, alt, az):
         """ convert altitude and azimuth to map coordinates
         
             Args:
-                alt(float): altitude in degrees
-                az(float): azimuth in radians
+                alt(float or numpy.ndarray): altitude in degrees
+                az(float or numpy.ndarray): azimuth in radians
             
             Returns:
-                tuple: SVG coordinates
+                tuple: SVG coordinates (arrays if arrays were provided)
             
             self.inout(float): Is the point of view inside or outside the
                 celestial globe?
         """
         alt = 90-alt
+        if isinstance(az,float):
+            # scalar (math is much faster than numpy for single values)
+            return self.inout*alt*math.sin(az),-alt*math.cos(az)
         return self.inout*alt*numpy.sin(az),-alt*numpy.cos(az)
     
     @staticmethod
     def magnitude_to_r(magnitude):
-        """ get radius to draw out of magnitude """
+        """ get radius to draw out of magnitude
+        
+            `magnitude` may be a single value or a numpy array.
+        """
+        if isinstance(magnitude,numpy.ndarray):
+            return numpy.maximum((6.0-magnitude)*0.1,0.05)
         r = (6.0-magnitude)*0.1
         if r<0.05: r = 0.05
         return r
@@ -426,12 +782,13 @@ class SkymapBinder:
         return  '<path fill="%s" stroke="none" d="M%.4f,%.4fl%.4f,%.4fl%.4f,%.4fl%.4f,%.4fl%.4f,%.4fl%.4f,%.4fl%.4f,%.4fl%.4f,%.4fz" />' % (
             color,x-r,y,0.7*r,0.3*r,0.3*r,0.7*r,0.3*r,-0.7*r,0.7*r,-0.3*r,-0.7*r,-0.3*r,-0.3*r,-0.7*r,-0.3*r,0.7*r)
 
-    def draw_constellationship(self, alts_degrees, azs_radians, hips, color, zodiac_color, line_width, xy_func, min2, max2):
+    def draw_constellationship(self, alts_degrees, xs, ys, hips, color, zodiac_color, line_width, min2, max2):
         """ draw constellation lines 
         
             Args:
                 alts_degrees (list): altitudes of the stars
-                azs_radians (list): azimuths of the stars
+                xs (list): x coordinates of the stars in the map
+                ys (list): y coordinates of the stars in the map
                 hips (list): Hipparcos catalogue numbers of the stars
                 color (str): line color
             
@@ -448,7 +805,9 @@ class SkymapBinder:
         else:
             col = ''
         # index of the Hipparcos catalogue numbers in the list
-        hips_index = {val:idx for idx,val in enumerate(hips)}
+        # (The lookup method is bound to a local variable as it is used
+        # for every line.)
+        hips_index = {val:idx for idx,val in enumerate(hips)}.get
         # format
         s = ['<g id="constellations" stroke="%s" stroke-width="%s" fill="none">' % (color,line_width)]
         # loop over all the constellations
@@ -457,12 +816,12 @@ class SkymapBinder:
             d = []
             for line in constellation[1]:
                 # one single line
-                p1 = hips_index.get(line[0])
-                p2 = hips_index.get(line[1])
+                p1 = hips_index(line[0])
+                p2 = hips_index(line[1])
                 if p1 and p2 and (min2<=alts_degrees[p1]<=max2 or min2<=alts_degrees[p2]<=max2):
                     # both stars are available
-                    x1, y1 = xy_func(alts_degrees[p1],azs_radians[p1])
-                    x2, y2 = xy_func(alts_degrees[p2],azs_radians[p2])
+                    x1, y1 = xs[p1], ys[p1]
+                    x2, y2 = xs[p2], ys[p2]
                     if abs(x2-x1)>180.0:
                         if x1<x2:
                             d.append('M%.4f,%.4fL%.4f,%.4f' % (x1,y1,x2-360.0,y2))
@@ -492,51 +851,72 @@ class SkymapBinder:
             if not varsize:
                 r = weeutil.weeutil.to_float(format[0])
             col = format[1]
-            # filter
-            df = df[df['magnitude'] <= self.max_magnitude]
-            # create Star instance
-            selected_stars = Star.from_dataframe(df)
+            # filter and create Star instance
+            stars, mags, hips = selected_stars(df,self.max_magnitude)
             # calculate all the positions in the sky
-            apparent = observer.at(time_ti).observe(selected_stars).apparent()
-            c2s, c1s, distances, min2, max2 = coord_func(apparent)
+            # (Aberration and deflection change the position of a star by
+            # less than 21 arc seconds, which cannot be seen in the map.
+            # So the astrometric position is used directly, which saves
+            # calculating the positions of the deflecting planets. Like
+            # the apparent position, it is relative to the station.)
+            astrometric = self.get_observer_at(observer,time_ti).observe(stars)
+            positions = ICRF(astrometric.position.au,t=time_ti,center=get_station(self.almanac_obj))
+            c2s, c1s, distances, min2, max2 = coord_func(positions)
+            # map coordinates of all the stars at once
+            xs, ys = xy_func(c2s,c1s)
+            xs, ys = xs.tolist(), ys.tolist()
+            alts = c2s.tolist()
             # draw constellationship lines
             if self.show_constellations and self.constellationship and self.constellationship[0]:
-                s.append(self.draw_constellationship(c2s, c1s, df.index, constellation_line_color, zodiac_line_color, line_width, xy_func, min2, max2))
+                s.append(self.draw_constellationship(alts, xs, ys, hips, constellation_line_color, zodiac_line_color, line_width, min2, max2))
+            # stars within the map and stars with tooltip
+            visible = (c2s>=min2) & (c2s<=max2)
+            tooltip = numpy.flatnonzero(visible & (mags<=self.star_tooltip_max_magnitude)).tolist()
             # constellation names
-            if user.skyfieldalmanac.constellation_at:
-                abbrs = user.skyfieldalmanac.constellation_at(apparent)
+            # (They are shown in the tooltips of the visible stars only. So
+            # they are looked up for those stars only.)
+            abbrs = [None]*len(tooltip)
+            if user.skyfieldalmanac.constellation_at and tooltip:
+                abbrs = user.skyfieldalmanac.constellation_at(
+                        ICRF(positions.position.au[:,tooltip],t=time_ti)).tolist()
+            # radii of the stars
+            if varsize:
+                rs = SkymapBinder.magnitude_to_r(mags).tolist()
             else:
-                abbrs = [None]*len(alts)
+                rs = [r]*len(alts)
+            # tooltips of the bright stars
+            # (attributes used for every star are bound to local variables)
+            hip_to_starname = user.skyfieldalmanac.hip_to_starname
+            constellation_names = user.skyfieldalmanac.constellation_names
+            local_constellation_names = self.labels.get('Constellations',dict())
+            distance_text = self.get_text('Distance')
+            magnitude_text = self.get_text('Magnitude')
+            txts = dict()
+            for i, distance, abbr in zip(tooltip,(distances.light_seconds()[tooltip]/31557600).tolist(),abbrs):
+                hip = hips[i]
+                txt = [hip_to_starname(hip,'')]
+                if txt[0]: txt.append('\n')
+                txt.append('HIP%s\n' % hip)
+                if abbr:
+                    if abbr in local_constellation_names:
+                        # constellation name in local language
+                        nm = local_constellation_names[abbr]
+                    elif constellation_names:
+                        # constellation name in latin
+                        nm = constellation_names[abbr]
+                    else:
+                        # constellation name not available
+                        nm = None
+                    if nm:
+                        txt.append('%s (%s)\n' % (nm,abbr))
+                if distance:
+                    txt.append('%s: %.0f %s\n' % (distance_text,distance,'Lj'))
+                txts[i] = '><title>%s%s: %.2f</title></circle>' % (''.join(txt),magnitude_text,mags[i])
             # draw stars
+            # (All the visible stars are formatted in one pass. Most of
+            # them have no tooltip.)
             s.append('<g fill="%s" stroke="none">\n' % col)
-            for alt, az, distance, mag, hip, abbr in zip(c2s,c1s,distances.light_seconds()/31557600,df['magnitude'],df.index,abbrs):
-                if min2<=alt<=max2:
-                    x,y = xy_func(alt,az)
-                    #loginf('%s %s %s %s' % (alt,az,x,y))
-                    #break
-                    if varsize: r = SkymapBinder.magnitude_to_r(mag)
-                    if mag<=self.star_tooltip_max_magnitude:
-                        txt = user.skyfieldalmanac.hip_to_starname(hip,'')
-                        if txt: txt += '\n'
-                        txt += 'HIP%s\n' % hip
-                        if abbr:
-                            if abbr in self.labels.get('Constellations',dict()):
-                                # constellation name in local language
-                                nm = self.labels['Constellations'][abbr]
-                            elif user.skyfieldalmanac.constellation_names:
-                                # constellation name in latin
-                                nm = user.skyfieldalmanac.constellation_names[abbr]
-                            else:
-                                # constellation name not available
-                                nm = None
-                            if nm:
-                                txt += '%s (%s)\n' % (nm,abbr)
-                        if distance:
-                            txt += '%s: %.0f %s\n' % (self.get_text('Distance'),distance,'Lj')
-                        txt = '><title>%s%s: %.2f</title></circle>' % (txt,self.get_text('Magnitude'),mag)
-                    else:
-                        txt = ' />'
-                    s.append('<circle id="HIP%s" cx="%.4f" cy="%.4f" r="%.2f"%s\n' % (hip,x,y,r,txt))
+            s.extend(['<circle id="HIP%s" cx="%.4f" cy="%.4f" r="%.2f"%s\n' % (hips[i],xs[i],ys[i],rs[i],txts.get(i,' />')) for i in numpy.flatnonzero(visible).tolist()])
             s.append('</g>\n')
         return ''.join(s)
     
@@ -554,15 +934,18 @@ class SkymapBinder:
         dec = numpy.array([(90-abs(almanac_obj.lat))*(1 if almanac_obj.lat>=0 else -1)]*24)
         # Below 20° of latitude the circle is too small for text marks
         above20 = abs(almanac_obj.lat)>20
-        # create fictive stars holding the positions according to the 
-        # coordinates defined before
-        body = Star(ra_hours=hours,dec_degrees=dec,epoch=time_ti)
+        # directions according to the coordinates defined before
+        # (They are points on the celestial sphere, not heavenly bodies.
+        # So there is nothing to observe, and they are converted to
+        # horizontal coordinates directly.)
+        positions = ICRF(position_of_radec(hours,dec).position.au,t=time_ti,center=get_station(almanac_obj))
         # get the current altitudes and azimuths for those positions
-        apparent = observer.at(time_ti).observe(body).apparent()
-        alts, azs, _ = apparent.altaz(temperature_C=almanac_obj.temperature,pressure_mbar=almanac_obj.pressure)
+        alts, azs, _ = positions.altaz(temperature_C=almanac_obj.temperature,pressure_mbar=almanac_obj.pressure)
         # draw the circle
-        for alt, az, hour in zip(alts.degrees,azs.radians,hours):
-            x,y = self.to_xy(alt,az)
+        alts = alts.degrees
+        azs = azs.radians
+        xx, yy = self.to_xy(alts,azs)
+        for alt, az, hour, x, y in zip(alts.tolist(),azs.tolist(),hours.tolist(),xx.tolist(),yy.tolist()):
             #dir = numpy.arctan2(x,y+90-almanac_obj.lat)
             #r = 1 if hour!=0 else 2
             #s += SkymapBinder.four_pointed_star(x,y,r,color)
@@ -583,25 +966,30 @@ class SkymapBinder:
         time0_ts = time.thread_time_ns()*0.000001
         s =['<g id="circle_of_ecliptic" fill="%s" stroke="none">\n' % color]
         # list of the days of a year, starting 1/2 year before the current day
-        days = user.skyfieldalmanac.ts.ut1_jd([time_ti.ut1+i-182 for i in range(365)])
+        days = low_precision_time(user.skyfieldalmanac.ts.ut1_jd([time_ti.ut1+i-182 for i in range(365)]))
         # calculating right ascension and declination of the sun for all those
         # dates.
         ra, dec, _ = observer.at(days).observe(user.skyfieldalmanac.ephemerides['sun']).apparent().radec('date')
         time1_ts = time.thread_time_ns()*0.000001
-        # create fictive stars holding those positions in sky
-        dots = Star(ra_hours=ra.hours,dec_degrees=dec.degrees,epoch=time_ti)
-        # calculate the positions of those objects for the current date and time
-        apparent = observer.at(time_ti).observe(dots).apparent()
+        # directions holding those positions in sky, and the first point
+        # of Aries as the last one (see below)
+        # (They are points on the celestial sphere. So there is nothing
+        # to observe, and they are converted to the coordinates of the
+        # map directly.)
+        dots = position_of_radec(numpy.append(ra.hours,0.0),numpy.append(dec.degrees,0.0))
+        apparent = ICRF(dots.position.au,t=time_ti,center=get_station(almanac_obj))
         time2_ts = time.thread_time_ns()*0.000001
         # calculate altitude and azimuth for those positions
         #alts, azs, _ = apparent.altaz(temperature_C=almanac_obj.temperature,pressure_mbar=almanac_obj.pressure)
         alts, azs, _, min2, max2 = coord_func(apparent)
+        aries_x, aries_y = xy_func(alts[-1],azs[-1])
+        alts, azs = alts[:-1], azs[:-1]
         time3_ts = time.thread_time_ns()*0.000001
         # draw dots of the circle of the ecliptic
-        for alt, az, day in zip(alts,azs,days):
-            if min2<=alt<=max2:
-                x,y = xy_func(alt,az)
-                s.append('<circle cx="%.4f" cy="%.4f" r="%s" />\n' % (x,y,0.2))
+        visible = (alts>=min2) & (alts<=max2)
+        # (one format string for all the dots, applied in one pass)
+        xx, yy = xy_func(alts[visible],azs[visible])
+        s.extend(['<circle cx="%.4f" cy="%.4f" r="0.2" />\n' % xy for xy in zip(xx.tolist(),yy.tolist())])
         time4_ts = time.thread_time_ns()*0.000001
         # mark first point of Aries (March equinox, in northern hemisphere
         # spring equinox)
@@ -612,21 +1000,24 @@ class SkymapBinder:
         #       "equinox" is that the former refers to the position on the
         #       celestial globe and the latter to the date and time of the
         #       event.
-        dot = Star(ra_hours=0,dec_degrees=0,epoch=time_ti)
-        apparent = observer.at(time_ti).observe(dot).apparent()
-        alt, az, _ = apparent.altaz(temperature_C=almanac_obj.temperature,pressure_mbar=almanac_obj.pressure)
-        x,y = self.to_xy(alt.degrees,az.radians)
-        s.append('<circle cx="%.4f" cy="%.4f" r="%s"><title>%s</title></circle>\n' % (x,y,0.5,self.get_text('First point of Aries')))
+        # Its position was calculated together with the dots above.
+        s.append('<circle cx="%.4f" cy="%.4f" r="%s"><title>%s</title></circle>\n' % (aries_x,aries_y,0.5,self.get_text('First point of Aries')))
         logdbg("ecliptic elapsed CPU time %.3fms %.3fms %.3fms %.3fms" % (time1_ts-time0_ts,time2_ts-time1_ts,time3_ts-time2_ts,time4_ts-time3_ts))
         s.append('</g>\n')
         return ''.join(s)
     
     def path_of_body(self, observer, almanac_obj, time_ti, body, color='#FFFFFF', hide=False):
         """ path of the body at the day of time_ti """
-        alt, _, _ = observer.at(time_ti).observe(user.skyfieldalmanac.ephemerides[body]).apparent().altaz()
+        body_eph = user.skyfieldalmanac.ephemerides[body]
+        # (The apparent position is required to draw the body anyway.)
+        alt, _, _ = apparent_position(observer,time_ti,body_eph,almanac_obj.time_ts).altaz()
         if alt.degrees<0.0: return ''
-        hours = user.skyfieldalmanac.ts.ut1_jd([time_ti.ut1+i*0.01-0.5 for i in range(100)])
-        alts, azs, _ = observer.at(hours).observe(user.skyfieldalmanac.ephemerides[body]).apparent().altaz()
+        hours = low_precision_time(user.skyfieldalmanac.ts.ut1_jd([time_ti.ut1+i*0.01-0.5 for i in range(100)]))
+        # Aberration and deflection shift the path by less than 1 arc
+        # minute. That cannot be seen in the map. So the astrometric
+        # positions are converted to horizontal coordinates directly.
+        astrometric = observer.at(hours).observe(body_eph)
+        alts, azs, _ = ICRF(astrometric.position.au,t=hours,center=get_station(almanac_obj)).altaz()
         if numpy.max(alts.degrees)<=0: return ''
         altsdegrees = alts.degrees
         if altsdegrees[0]>=0: return ''
@@ -634,10 +1025,7 @@ class SkymapBinder:
         s = ['<path id="path_of_%s" stroke="%s" stroke-width="1" opacity="0.5" fill="none" ' % (body,color)]
         if hide: s.append('style="display:none" ')
         s.append('d="')
-        c = 'M'
-        for x,y in zip(xx,yy):
-            s.append('%s%.4f,%.4f' % (c,x,y))
-            c = 'L'
+        s.append(polyline(xx,yy))
         s.append('" />\n')
         return ''.join(s)
 
@@ -683,10 +1071,7 @@ class SkymapBinder:
                 s.append('stroke="%s" fill="%s" ' % ('none',color))
             s.append('d="')
             xx,yy = self.to_xy(self.horizon[0],self.horizon[1])
-            c = 'M'
-            for x,y in zip(xx,yy):
-                s.append('%s%.4f,%.4f' % (c,x,y))
-                c = 'L'
+            s.append(polyline(xx,yy))
             if area:
                 s.append('L%.4f,%.4f' % (xx[0],yy[0]))
                 s.append('L0,-89.8A89.8,89.8 0 0 1 0,89.8A89.8,89.8 0 0 1 0,-89.8')
@@ -699,47 +1084,147 @@ class SkymapBinder:
             else:
                 return '<circle cx="0" cy="0" r="89.8" />'
 
-    def draw_solar_system_bodies(self, observer, time_ti, coord_func, xy_func, label_coord_func, bodies, moon_background_color, almanac_obj, r_min):
-        """ draw Sun, Moon, planets, and satellites """
-        earth = user.skyfieldalmanac.ephemerides[user.skyfieldalmanac.EARTH]
-        station = wgs84.latlon(almanac_obj.lat,almanac_obj.lon,elevation_m=almanac_obj.altitude)
+    def draw_solar_system_bodies(self, observer, time_ti, coord_func, xy_func, label_coord_func, bodies, moon_background_color, almanac_obj, r_min, apparents=None, min_altitude=None):
+        """ draw Sun, Moon, planets, and satellites
+
+            Args:
+                apparents(dict): apparent positions already calculated for
+                    `time_ti` by the caller, indexed by the body name
+                min_altitude(float): bodies with a geometric altitude below
+                    that value in degrees are skipped without calculating
+                    their apparent position, None to include all bodies
+        """
+        ephemerides = user.skyfieldalmanac.ephemerides
+        earth = ephemerides[user.skyfieldalmanac.EARTH]
+        station = get_station(almanac_obj)
         ordinates = almanac_obj.formatter.ordinate_names
-        dots = []
+        planets = set(user.skyfieldalmanac.planets_list)
+        if apparents is None: apparents = dict()
+        # The position of the observer is the same for all the bodies.
+        observer_at = self.get_observer_at(observer,time_ti)
+        earth_at = earth.at(time_ti)
+        # apparent positions calculated before for the same time and place
+        # (The timestamp is rounded to 1 second. The Moon moves less than
+        # 1 arc second within that time.)
+        cache = _apparent_positions(observer, round(almanac_obj.time_ts))
+        # First pass: positions of all the bodies
+        observed = []
+        astrometrics = []
+        # geocentric positions of the satellites and of the station
+        satellites = dict()
+        station_at = None
         for body in bodies:
-            format = self.formats.get(body,self.formats.get('%s_*' % body.split('_')[0]))
-            body_eph = user.skyfieldalmanac.ephemerides.get(body.lower())
+            body_eph = ephemerides.get(body.lower())
             if body_eph is None:
                 logerr("No data for heavenly object '%s' available. Is that a satellite that passed away?" % body)
                 continue
             elif isinstance(body_eph,EarthSatellite):
-                apparent = (body_eph-station).at(time_ti)
+                # (the same as `(body_eph-station).at(time_ti)`, but the
+                # station is calculated once only, and the geocentric
+                # position of the satellite is kept for the tooltip)
+                if station_at is None: station_at = station.at(time_ti)
+                satellites[body] = body_eph.at(time_ti)
+                apparent = ICRF(satellites[body].position.au-station_at.position.au,t=time_ti,center=station)
+            elif body in apparents:
+                apparent = apparents[body]
+            elif body_eph in cache:
+                apparent = cache[body_eph]
+            else:
+                astrometrics.append((body,body_eph,astrometric_position(observer_at,body_eph)))
+                continue
+            observed.append((body,body_eph,apparent))
+        if astrometrics and min_altitude is not None:
+            # Aberration and refraction change the altitude by less than
+            # 1 degree. So bodies far below the horizon can be sorted out
+            # before the apparent position is calculated.
+            alts, _, _ = geometric_altaz(
+                station.rotation_at(time_ti),
+                numpy.array([i[2].position.au for i in astrometrics]).T)
+            astrometrics = [i for i, alt in zip(astrometrics,alts) if alt>=min_altitude]
+        for body, body_eph, astrometric in astrometrics:
+            apparent = astrometric.apparent()
+            cache[body_eph] = apparent
+            observed.append((body,body_eph,apparent))
+        if not observed: return ''
+        # The position vectors of all the bodies are combined into one
+        # position object, so that the map coordinates of all of them
+        # are calculated by one call to `coord_func`. The vectors are
+        # relative to the station in any case.
+        positions = ICRF(
+            numpy.array([i[2].position.au for i in observed]).T,
+            t=time_ti,
+            center=station
+        )
+        alts, azs, distances, min2, max2 = coord_func(positions)
+        # Which bodies are within the map? And where to draw them?
+        visible = (alts>=min2) & (alts<=max2)
+        if not visible.any(): return ''
+        xs, ys = xy_func(alts, azs)
+        xs, ys = xs.tolist(), ys.tolist()
+        # coordinates for the tooltips (including refraction if the map
+        # does not use horizontal coordinates), required for the visible
+        # bodies only
+        # (converted to Python floats once for all the bodies)
+        label_alts, label_azs, label_decs, label_ras = (numpy.asarray(i) for i in label_coord_func(
+            ICRF(positions.position.au[:,visible],t=time_ti,center=station),
+            alts[visible],
+            azs[visible]
+        ))
+        # index of the nearest of the 16 compass points
+        # (azimuth is always between 0 and 360 degrees, `& 15` maps
+        # 360 degrees to north)
+        dirs = ((label_azs*(16.0/360.0)+0.5).astype(int)&15).tolist()
+        label_alts, label_azs, label_decs, label_ras = (i.tolist() for i in (label_alts,label_azs,label_decs,label_ras))
+        # texts of the tooltips, the same for all the bodies
+        texts = {
+            'In constellation':self.get_text('In constellation'),
+            'ecliptical':self.get_text('ecliptical').capitalize(),
+            'Altitude':self.get_text('Altitude'),
+            'Azimuth':self.get_text('Azimuth'),
+            'equatorial':self.get_text('equatorial').capitalize(),
+            'Phase':self.get_text('Phase').capitalize(),
+            'Phase angle':self.get_text('Phase angle'),
+            'Apparent size':self.get_text('Apparent size'),
+            'Distance':self.get_text('Distance').capitalize(),
+            'Magnitude':self.get_text('Magnitude'),
+            'Position':self.get_text('Position')
+        }
+        unit = almanac_obj.formatter.get_label_string("km")
+        if not unit: unit = " km"
+        # Second pass: labels and symbols of the visible bodies
+        # (distances in km as Python floats, converted once for all bodies)
+        distances_km = distances.km.tolist()
+        dots = []
+        # (distances of the dots in a separate list as the sort key)
+        dot_distances = []
+        for k, n in enumerate(numpy.flatnonzero(visible)):
+            body, body_eph, apparent = observed[n]
+            distance = distances_km[n]
+            x, y = xs[n], ys[n]
+            format = self.formats.get(body)
+            if format is None:
+                format = self.formats.get('%s_*' % body.split('_')[0])
+            if isinstance(body_eph,EarthSatellite):
                 label = '%s (#%s)' % (self.labels.get(body,body_eph.name),body_eph.model.satnum)
-                short_label = body_eph.name
-                if body_eph.name.startswith('GPS ') and '(PRN' in body_eph.name:
-                    i = body_eph.name.find('(PRN')
-                    if i>=0:
-                        short_label = body_eph.name[i+4:].split(')')[0].strip()
-                elif '(GALILEO' in body_eph.name:
-                    i = body_eph.name.find('(GALILEO')
-                    if body_eph.name[i+8]=='-': i += 1
-                    short_label = body_eph.name[i+8:].split(')')[0].strip()
-                elif body_eph.name.startswith('METEOSAT-'):
-                    i = body_eph.name.find('(MSG-')
-                    short_label = body_eph.name[i+5:].split(')')[0].strip()
+                short_label = satellite_short_label(body_eph.name)
                 magnitude = None
                 constellation_name = ''
                 ecliptic_coords = ''
             else:
-                # apparent position
-                apparent = observer.at(time_ti).observe(body_eph).apparent()
                 # label
                 label = self.get_text(body)
                 short_label = label
                 # magnitude
-                try:
-                    magnitude = planetary_magnitude(apparent)
-                except (AttributeError,ArithmeticError,ValueError,TypeError):
+                # (Skyfield has formulas for the planets only and would
+                # raise an exception for the Sun, the Moon, and other
+                # bodies.)
+                if getattr(apparent,'target',None) not in MAGNITUDE_TARGETS:
                     magnitude = None
+                else:
+                    try:
+                        magnitude = planetary_magnitude(apparent)
+                    except (AttributeError,ArithmeticError,ValueError,TypeError):
+                        magnitude = None
                 # constellation names
                 if user.skyfieldalmanac.constellation_at:
                     abbr = user.skyfieldalmanac.constellation_at(apparent)
@@ -752,7 +1237,7 @@ class SkymapBinder:
                             nm = None
                         if nm:
                             constellation_name = '\n%s: %s (%s)' % (
-                                self.get_text('In constellation'),
+                                texts['In constellation'],
                                 self.get_text(nm),
                                 abbr)
                         else:
@@ -762,127 +1247,126 @@ class SkymapBinder:
                 else:
                     constellation_name = ''
                 # geocentric ecliptic coordinates
-                elat, elon, _ = earth.at(time_ti).observe(body_eph).apparent().frame_latlon(ecliptic_frame)
-                ecliptic_coords = '\n%s: &#946;=%.4f&#176; &#955;=%.4f&#176;' % (self.get_text('ecliptical').capitalize(),elat.degrees,elon.degrees)
-            alt, az, distance, min2, max2 = coord_func(apparent)
-            if min2<=alt<=max2:
-                #ra, dec, _ = apparent.radec('date')
-                x,y = xy_func(alt,az)
-                alt, az, dec, ra = label_coord_func(apparent, alt, az)
-                dir = int(round(az/22.5,0))
-                if dir==16: dir = 0
-                # horizontal coordinate system: altitude, azimuth
-                # rotierendes äquatoriales Koordinatensystem: ra dec
-                # ortsfestes äquatoriales Koordindatensystem: ha dec
-                txt = '%s\n%s=%.1f&#176; %s=%.1f&#176; %s\n%s: &#945;=%.1fh &#948;=%.1f&#176;%s%s' % (
-                    label,
-                    self.get_text('Altitude'),alt,
-                    self.get_text('Azimuth'),az,ordinates[dir],
-                    self.get_text('equatorial').capitalize(),ra,dec,
-                    ecliptic_coords,
-                    constellation_name)
-                phase = None
-                if body=='sun':
-                    # sun (radius about 16/60°)
-                    radius = user.skyfieldalmanac.SUN_RADIUS_KM/distance.km*RAD2DEG
-                    r = 4
-                elif body=='moon':
-                    # earth moon
-                    #radius = _moon_radius_m/distance.m*RAD2DEG
-                    radius = user.skyfieldalmanac.MEAN_MOON_RADIUS_KM/distance.km*RAD2DEG
-                    r = 2
-                    phase = skyfield.almanac.moon_phase(user.skyfieldalmanac.sun_and_planets,time_ti)
-                    moon_index = int((phase.degrees/360.0 * 8) + 0.5) & 7
-                    ptext = almanac_obj.moon_phases[moon_index]
-                    txt += '\n%s: %.0f&#176; %s' % (self.get_text('Phase').capitalize(),phase.degrees,ptext)
-                elif body in user.skyfieldalmanac.planets_list and magnitude is not None:
-                    # planets other than earth
-                    radius = user.skyfieldalmanac.SIZES[body.split('_')[0]][0]/distance.km*RAD2DEG
-                    r = SkymapBinder.magnitude_to_r(magnitude)
-                    if r<r_min: r = r_min
-                    if body in {'mercury','venus'}:
-                        phase, dir, idx = user.skyfieldalmanac.planet_phase(body_eph,time_ti)
-                        try:
-                            txt += '\n%s: %.0f&#176; idx=%s %s' % (
-                                self.get_text('Phase angle'),
-                                phase.degrees,
-                                idx,getattr(self,'%s_phases' % body)[idx]
-                            )
-                        except (LookupError,TypeError):
-                            pass
-                else:
-                    # other heavenly objects including Pluto
-                    radius = None
-                    r = r_min
-                if body in {'mars','mars_barycenter'}:
-                    col = '#ff8f5e'
-                elif body=='moon':
-                    #col = ['rgba(255,243,228,0.3)','#ffecd5']
-                    col = [moon_background_color,'#ffecd5']
-                else:
-                    col = '#ffffff'
-                shape = None
-                if format:
-                    if format[0] and format[0]!='mag': 
-                        r = weeutil.weeutil.to_float(format[0])
-                    if format[1] and format[1][0]=='#': 
-                        col = format[1]
-                    if len(format)>=3 and format[2]:
-                        shape = format[2]
+                elat, elon, _ = astrometric_position(earth_at,body_eph).apparent().frame_latlon(ecliptic_frame)
+                ecliptic_coords = '\n%s: &#946;=%.4f&#176; &#955;=%.4f&#176;' % (texts['ecliptical'],elat.degrees,elon.degrees)
+            alt, az, dec, ra, dir = label_alts[k], label_azs[k], label_decs[k], label_ras[k], dirs[k]
+            # horizontal coordinate system: altitude, azimuth
+            # rotierendes äquatoriales Koordinatensystem: ra dec
+            # ortsfestes äquatoriales Koordindatensystem: ha dec
+            txt = ['%s\n%s=%.1f&#176; %s=%.1f&#176; %s\n%s: &#945;=%.1fh &#948;=%.1f&#176;%s%s' % (
+                label,
+                texts['Altitude'],alt,
+                texts['Azimuth'],az,ordinates[dir],
+                texts['equatorial'],ra,dec,
+                ecliptic_coords,
+                constellation_name)]
+            phase = None
+            if body=='sun':
+                # sun (radius about 16/60°)
+                radius = SUN_RADIUS_FACTOR/distance
+                r = 4
+            elif body=='moon':
+                # earth moon
+                # (`radius` is the apparent radius for the tooltip, `r`
+                # the radius of the symbol drawn)
+                radius = MOON_RADIUS_FACTOR/distance
+                r = 2
+                phase = moon_phase(almanac_obj)
+                phase_degrees = phase.degrees
+                moon_index = int((phase_degrees/360.0 * 8) + 0.5) & 7
+                ptext = almanac_obj.moon_phases[moon_index]
+                txt.append('\n%s: %.0f&#176; %s' % (texts['Phase'],phase_degrees,ptext))
+            elif body in planets and magnitude is not None:
+                # planets other than earth
+                radius = radius_factor(body)/distance
+                r = SkymapBinder.magnitude_to_r(magnitude)
+                if r<r_min: r = r_min
+                if body in {'mercury','venus'}:
+                    phase, dir, idx = user.skyfieldalmanac.planet_phase(body_eph,time_ti)
+                    try:
+                        txt.append('\n%s: %.0f&#176; idx=%s %s' % (
+                            texts['Phase angle'],
+                            phase.degrees,
+                            idx,getattr(self,'%s_phases' % body)[idx]
+                        ))
+                    except (LookupError,TypeError):
+                        pass
+            else:
+                # other heavenly objects including Pluto
+                radius = None
+                r = r_min
+            if body=='moon':
+                #col = ['rgba(255,243,228,0.3)','#ffecd5']
+                col = [moon_background_color,'#ffecd5']
+            else:
+                col = SkymapBinder.BODY_COLORS.get(body,'#ffffff')
+            shape = None
+            if format:
+                if format[0] and format[0]!='mag': 
+                    r = weeutil.weeutil.to_float(format[0])
+                if format[1] and format[1][0]=='#': 
+                    col = format[1]
+                if len(format)>=3 and format[2]:
+                    shape = format[2]
+            else:
+                short_label = None
+            if radius:
+                dm, ds = divmod(radius*2.0*3600,60)
+                if dm>0:
+                    txt.append('\n%s: %.0f&#8242;%.1f&#8243;' % (texts['Apparent size'],dm,ds))
                 else:
-                    short_label = None
-                if radius:
-                    dm, ds = divmod(radius*2.0*3600,60)
-                    if dm>0:
-                        txt += '\n%s: %.0f&#8242;%.1f&#8243;' % (self.get_text('Apparent size'),dm,ds)
-                    else:
-                        txt += '\n%s: %.1f&#8243;' % (self.get_text('Apparent size'),ds)
-                # According to ISO 31 the thousand separator is a thin space
-                # independent of language.
-                unit = almanac_obj.formatter.get_label_string("km")
-                if not unit: unit = " km"
-                txt += '\n{:}: {:_.0f}{:}'.format(self.get_text('Distance').capitalize(),distance.km,unit).replace('_','&#8239;')
-                if magnitude:
-                    txt += '\n%s: %.2f' % (self.get_text('Magnitude'),magnitude)
-                if isinstance(body_eph,EarthSatellite):
-                    point = wgs84.geographic_position_of(body_eph.at(time_ti))
-                    txt += '\n{:}: {:.4f}&#176; {:}, {:.4f}&#176; {:}, {:_.0f}{:}'.format(
-                        self.get_text('Position'),
-                        abs(point.latitude.degrees),
-                        ordinates[0 if point.latitude.degrees>=0.0 else 8],
-                        abs(point.longitude.degrees),
-                        ordinates[4 if point.longitude.degrees>=0.0 else 12],
-                        point.elevation.km,
-                        unit).replace('_','&#8239;')
-                dots.append((body,txt,x,y,r,distance,col,radius,phase,short_label,shape))
-        dots.sort(key=lambda x:-x[5].km)
+                    txt.append('\n%s: %.1f&#8243;' % (texts['Apparent size'],ds))
+            # According to ISO 31 the thousand separator is a thin space
+            # independent of language.
+            txt.append('\n{:}: {:_.0f}{:}'.format(texts['Distance'],distance,unit).replace('_','&#8239;'))
+            if magnitude:
+                txt.append('\n%s: %.2f' % (texts['Magnitude'],magnitude))
+            if isinstance(body_eph,EarthSatellite):
+                point = wgs84.geographic_position_of(satellites[body])
+                txt.append('\n{:}: {:.4f}&#176; {:}, {:.4f}&#176; {:}, {:_.0f}{:}'.format(
+                    texts['Position'],
+                    abs(point.latitude.degrees),
+                    ordinates[0 if point.latitude.degrees>=0.0 else 8],
+                    abs(point.longitude.degrees),
+                    ordinates[4 if point.longitude.degrees>=0.0 else 12],
+                    point.elevation.km,
+                    unit).replace('_','&#8239;'))
+            dots.append((body,''.join(txt),x,y,r,distance,col,radius,phase,short_label,shape))
+            dot_distances.append(distance)
+        # draw far bodies first so that near bodies cover them
         s = []
-        for dot in dots:
+        # (The order is calculated from the distances in km at once, so
+        # there is no access to the tuples in `dots` for sorting.)
+        for i in numpy.argsort(numpy.negative(dot_distances),kind='stable').tolist():
+            dot = dots[i]
             if dot[0]=='moon':
                 s.append(moon(*dot))
             else:
-                s.append('<g id="%s"><title>%s</title>\n' % (dot[0],dot[1]))
-                if dot[10]=='square':
-                    s.append('<rect x="%.4f" y="%.4f" width="%.4f" height="%.4f" fill="%s" stroke="none" />\n' % (dot[2]-dot[4],dot[3]-dot[4],2*dot[4],2*dot[4],dot[6]))
-                elif dot[10]=='rhombus':
-                    a2 = 1.414213562373095*dot[4]
-                    s.append('<path fill="%s" stroke="none" d="M%.4f,%.4fl%.4f,%.4fl%.4f,%.4fl%.4f%.4fz" />\n' % (dot[6],dot[2],dot[3]-a2,a2,a2,-a2,a2,-a2,-a2))
-                elif dot[10]=='triangle':
-                    a2 = 0.866025403784439*dot[4]
-                    s.append('<path fill="%s" stroke="none" d="M%.4f,%.4fh%.4fl%.4f,%.4fz" />\n' % (dot[6],dot[2]-a2,dot[3]+0.5*dot[4],2*a2,-a2,-1.5*dot[4]))
+                body, txt, x, y, r, _, col, _, _, short_label, shape = dot
+                if shape=='square':
+                    s.append(SkymapBinder.BODY_SQUARE % (body,txt,x-r,y-r,2*r,2*r,col))
+                elif shape=='rhombus':
+                    a2 = 1.414213562373095*r
+                    s.append(SkymapBinder.BODY_RHOMBUS % (body,txt,col,x,y-a2,a2,a2,-a2,a2,-a2,-a2))
+                elif shape=='triangle':
+                    a2 = 0.866025403784439*r
+                    s.append(SkymapBinder.BODY_TRIANGLE % (body,txt,col,x-a2,y+0.5*r,2*a2,-a2,-1.5*r))
                 else:
-                    s.append( '<circle cx="%.4f" cy="%.4f" r="%.2f" fill="%s" stroke="none" />\n' % (dot[2],dot[3],dot[4],dot[6]))
-                if dot[9] and len(dot[9])<=2:
-                    s.append('<text x="%.4f" y="%.4f" font-size="%s" fill="#fff" text-anchor="middle" dominant-baseline="middle">%s</text>' % (dot[2],dot[3],dot[4]*1.2,dot[9]))
-                s.append('</g>\n')
+                    s.append(SkymapBinder.BODY_CIRCLE % (body,txt,x,y,r,col))
+                if short_label and len(short_label)<=2:
+                    s.append(SkymapBinder.BODY_LABEL % (x,y,r*1.2,short_label))
+                else:
+                    s.append('</g>\n')
         return ''.join(s)
 
     def get_text(self, text):
         """ get localized text """
         return self.labels.get(text,text)
     
-    def get_colors(self, observer, time_ti):
-        alt, _, _ = observer.at(time_ti).observe(user.skyfieldalmanac.ephemerides['sun']).apparent().altaz()
+    def get_colors(self, observer, time_ti, sun_apparent=None):
+        if sun_apparent is None:
+            sun_apparent = apparent_position(observer,time_ti,user.skyfieldalmanac.ephemerides['sun'],self.almanac_obj.time_ts)
+        alt, _, _ = sun_apparent.altaz()
         if alt.degrees>(-0.27):
             # light day (sun above horizon)
             background_color = self.day_color
@@ -898,14 +1382,121 @@ class SkymapBinder:
         else:
             # dawn (sun between 18 degrees and 0.27 degrees below the horizon)
             dawn = 3.0-abs(alt.degrees)/6.0
-            background_color = tuple([int(n+dawn*dawn*(d-n)/9.0) for n,d in zip(self.night_color,self.day_color)])
-            moon_background_color = "#%02X%02X%02X" % tuple([int(n+dawn*dawn*(d-n)/9.0) for n,d in zip((42,41,39),(207,207,230))])
+            # interpolate background, moon background, and horizon color
+            # at once
+            # (The weight is a scalar, so it is calculated before it is
+            # applied to the array.)
+            night = numpy.array((self.night_color,(42,41,39),self.horizon_night_color))
+            day = numpy.array((self.day_color,(207,207,230),self.horizon_day_color))
+            background_color, moon_background_color, horizon_color = (
+                tuple(rgb) for rgb in (night+(dawn*dawn/9.0)*(day-night)).astype(int).tolist())
+            moon_background_color = "#%02X%02X%02X" % moon_background_color
             constellation_line_color = '#A0A000'
-            horizon_color = tuple([int(n+dawn*dawn*(d-n)/9.0) for n,d in zip(self.horizon_night_color,self.horizon_day_color)])
         background_color = "#%02X%02X%02X" % background_color
         horizon_color = "#%02X%02X%02X" % horizon_color
         return background_color, moon_background_color, constellation_line_color, horizon_color
 
+    @staticmethod
+    @functools.lru_cache(maxsize=8)
+    def azimuth_scale(inout, ordinates):
+        """ azimuth scale of the sky map
+        
+            The scale depends on the point of view and the language only.
+            So it is created once for each combination and then re-used.
+        
+            Args:
+                inout(float): point of view inside or outside the globe
+                ordinates(tuple): names of the compass points
+            
+            Returns:
+                str: SVG elements
+        """
+        s = []
+        # (same as `to_xy()` at altitudes 0 and -3 degrees using
+        # precalculated sine and cosine values)
+        xx1, yy1 = (inout*90)*SkymapBinder.SIN_AZ24,-90*SkymapBinder.COS_AZ24
+        xx2, yy2 = (inout*93)*SkymapBinder.SIN_AZ24,-93*SkymapBinder.COS_AZ24
+        s.append('<path fill="none" stroke="currentColor" stroke-width="0.4" d="')
+        s.append(''.join("M%.4f,%.4fL%.4f,%.4f" % xy for xy in zip(xx1.tolist(),yy1.tolist(),xx2.tolist(),yy2.tolist())))
+        s.append('" />\n')
+        #xx, yy = self.to_xy(-8,SkymapBinder.AZ24_LABEL_RAD)
+        xx, yy = (inout*99)*SkymapBinder.SIN_AZ24_LABEL,-97*SkymapBinder.COS_AZ24_LABEL
+        for i, (x, y) in enumerate(zip(xx.tolist(),yy.tolist())):
+            if i==0:
+                txt = ordinates[0] # north
+            elif i==6:
+                txt = ordinates[4] # east
+                x -= 3*inout
+            elif i==12:
+                txt = ordinates[8] # south
+            elif i==18:
+                txt = ordinates[12] # west
+                x += 2*inout
+            else:
+                txt = "%d°" % (i*15)
+            s.append('<text x="%.4f" y="%.4f" style="font-size:5px" fill="currentColor" text-anchor="middle" dominant-baseline="middle">%s</text>\n' % (x,y,txt))
+        return ''.join(s)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=8)
+    def celestial_equator(lat, pole_name):
+        """ celestial pole and equator of the sky map
+        
+            They depend on the latitude and the language only.
+        
+            Args:
+                lat(float): latitude of the station
+                pole_name(str): name of the celestial pole
+            
+            Returns:
+                str: SVG elements
+        """
+        s = []
+        # coordinate of celestial pole in the diagram
+        y1 = lat-90 if lat>=0 else 90+lat
+        # northern or southern hemisphere
+        y2 = 0 if lat>=0 else 1
+        # semi-major axis
+        # (cos(arcsin(u)) is the same as sqrt(1-u*u))
+        u = (90.0-abs(lat))/90.0
+        x1 = 90.0/math.sqrt(1.0-u*u)
+        # mark of celestial pole and line of celestial equator
+        s.append(
+            '<path fill="none" stroke="#808080" stroke-width="0.2" d="M-2.5,%.4fh5M-90,0A%.4f,90 0 0 %s 90,0" />\n' % (
+            y1,x1,y2))
+        # label of the celestial pole
+        s.append( 
+            '<text x="-3.5" y="%s" style="font-size:5px" fill="#808080" text-anchor="end" dominant-baseline="middle">%s</text>\n' % (
+            y1,pole_name))
+        return ''.join(s)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=8)
+    def location_text(lat, lon, location, formatter, converter, ordinates):
+        """ location of the station as SVG text elements
+        
+            The text depends on the location, the formatter, and the
+            converter only.
+        
+            Returns:
+                str: SVG elements
+        """
+        s = []
+        lat_s, lon_s = latlon_strings(lat,lon,formatter,converter)
+        if location:
+            s.append('<text x="-97" y="87" font-size="5" fill="currentColor" text-anchor="start">%s</text>\n' % location)
+            s.append('<text x="-97" y="92" font-size="3.5" fill="currentColor" text-anchor="start">%s %s, %s %s</text>\n' % (
+                lat_s.strip(),ordinates[0 if lat>=0 else 8],
+                lon_s,ordinates[4 if lon>=0 else 12]
+            ))
+        else:
+            s.append('<text x="-97" y="87" font-size="5" fill="currentColor" text-anchor="start">%s %s</text>\n' % (
+                lat_s.replace(' ','&#8199;'), # &numsp;
+                ordinates[0 if lat>=0 else 8]))
+            s.append('<text x="-97" y="93" font-size="5" fill="currentColor" text-anchor="start">%s %s</text>\n' % (
+                lon_s,ordinates[4 if lon>=0 else 12]))
+        return ''.join(s)
+
     def skymap(self, almanac_obj):
         """ create SVG image of the sky with heavenly bodies
         
@@ -916,10 +1507,10 @@ class SkymapBinder:
         log_start_ts = time.time()
         time0_ts = time.thread_time_ns()*0.000001
         ordinates = almanac_obj.formatter.ordinate_names
-        time_ti = user.skyfieldalmanac.timestamp_to_skyfield_time(almanac_obj.time_ts)
+        time_ti = skyfield_time(almanac_obj.time_ts)
         observer = SkymapBinder.get_observer(almanac_obj)
         #earth = user.skyfieldalmanac.ephemerides[user.skyfieldalmanac.EARTH]
-        station = wgs84.latlon(almanac_obj.lat,almanac_obj.lon,elevation_m=almanac_obj.altitude)
+        station = get_station(almanac_obj)
         width = self.width if self.width else 800
         # define function to get coordinates used for plot
         def coord_func(apparent):
@@ -933,8 +1524,9 @@ class SkymapBinder:
             ra, dec, _ = apparent.radec('date')
             return alt.degrees, az.radians, dist, 0.0, 90.0, alt, az, ra, dec
         # define function to convert coordinates to pixel
-        def xy_func(alt, az):
-            return self.to_xy(alt, az)
+        # (The bound method is used directly to save one function call
+        # for every conversion.)
+        xy_func = self.to_xy
         s = [
             SkymapAlmanacType.SVG_START,
             ' x="%s" y="%s"' % (self.x,self.y) if self.x is not None and self.y is not None else '',
@@ -954,8 +1546,10 @@ class SkymapBinder:
             '<!-- Created using WeeWX and weewx-skymap-almanac extension -->\n',
             '<defs><clipPath id="weewxskymapbackgroundclippath"><circle cx="0" cy="0" r="89.8" /></clipPath></defs>\n'
         ]
+        # apparent position of the Sun, also used for the background color
+        sun_apparent = apparent_position(observer,time_ti,user.skyfieldalmanac.ephemerides[user.skyfieldalmanac.SUN],almanac_obj.time_ts)
         # background
-        background_color, moon_background_color, constellation_line_color, horizon_color = self.get_colors(observer, time_ti)
+        background_color, moon_background_color, constellation_line_color, horizon_color = self.get_colors(observer, time_ti, sun_apparent)
         s.append('<circle cx="0" cy="0" r="90" fill="%s" stroke="currentColor" stroke-width="0.4" />\n' % background_color)
         # start clipping
         s.append('<g clip-path="url(#weewxskymapbackgroundclippath)">\n')
@@ -966,35 +1560,11 @@ class SkymapBinder:
         if self.show_path_of_moon:
             s.append(self.path_of_body(observer, almanac_obj, time_ti, user.skyfieldalmanac.EARTHMOON, color='#cfcfe6', hide=self.show_path_of_moon=='hide'))
         # altitude scale
-        s.append('<g id="altitude_scale">\n')
-        s.append('<path fill="none" stroke="#808080" stroke-width="0.2" d="M-90,0h180M0,-90v180')
-        for i in range(11):
-            if i!=5:
-                s.append('M%s,-1.5v3M-1.5,%sh3' % (i*15-75,i*15-75))
-        s.append('" />\n')
-        for i in range(11):
-            if i!=5:
-                s.append('<text x="%s" y="%s" style="font-size:5px" fill="#808080" text-anchor="middle" dominant-baseline="text-top">%s&#176;</text>' % (i*15-75,6,i*15+15 if i<5 else 165-i*15))
-                s.append( '<text x="%s" y="%s" style="font-size:5px" fill="#808080" text-anchor="start" dominant-baseline="middle">%s&#176;</text>' % (2.5,i*15-75,i*15+15 if i<5 else 165-i*15))
+        s.append(SkymapBinder.ALTITUDE_SCALE)
         # celestial pole and equator
         # displayed for latitude more than 5 degrees north or south only
         if abs(almanac_obj.lat)>5.0:
-            # coordinate of celestial pole in the diagram
-            y1 = almanac_obj.lat-90 if almanac_obj.lat>=0 else 90+almanac_obj.lat
-            # northern or southern hemisphere
-            y2 = 0 if almanac_obj.lat>=0 else 1
-            # semi-major axis
-            x1 = 90.0/numpy.cos(numpy.arcsin((90.0-abs(almanac_obj.lat))/90.0))
-            # name of the celestial pole
-            txt = ordinates[0 if almanac_obj.lat>=0 else 8]
-            # mark of celestial pole and line of celestial equator
-            s.append(
-                '<path fill="none" stroke="#808080" stroke-width="0.2" d="M-2.5,%.4fh5M-90,0A%s,90 0 0 %s 90,0" />\n' % (
-                y1,x1,y2))
-            # label of the celestial pole
-            s.append( 
-                '<text x="-3.5" y="%s" style="font-size:5px" fill="#808080" text-anchor="end" dominant-baseline="middle">%s</text>\n' % (
-                y1,txt))
+            s.append(SkymapBinder.celestial_equator(almanac_obj.lat,ordinates[0 if almanac_obj.lat>=0 else 8]))
             # circle of right ascension
             s.append(self.circle_of_right_ascension(observer, almanac_obj, time_ti))
         s.append('</g>\n')
@@ -1018,7 +1588,9 @@ class SkymapBinder:
             self.bodies+self.earthsatellites,
             moon_background_color,
             almanac_obj,
-            0.2
+            0.2,
+            {user.skyfieldalmanac.SUN:sun_apparent},
+            -1.0
         ))
         time4_ts = time.thread_time_ns()*0.000001
         # horizon
@@ -1027,34 +1599,7 @@ class SkymapBinder:
         # end clipping
         s.append('</g>\n')
         # azimuth scale
-        s.append('<path fill="none" stroke="currentColor" stroke-width="0.4" d="')
-        for i in range(24):
-            azh = i*15*DEG2RAD
-            x1,y1 = self.to_xy(0,azh)
-            x2,y2 = self.to_xy(-3,azh)
-            s.append("M%.4f,%.4fL%.4f,%.4f" % (x1,y1,x2,y2))
-        s.append('" />\n')
-        for i in range(24):
-            azh = i*15*DEG2RAD
-            if i==19 or i==7:
-                azh += 1.5*DEG2RAD
-            elif i==17:
-                azh -= 1.5*DEG2RAD
-            #x,y = self.to_xy(-8,azh)
-            x,y = self.inout*99*numpy.sin(azh),-97*numpy.cos(azh)
-            if i==0:
-                txt = ordinates[0] # north
-            elif i==6:
-                txt = ordinates[4] # east
-                x -= 3*self.inout
-            elif i==12:
-                txt = ordinates[8] # south
-            elif i==18:
-                txt = ordinates[12] # west
-                x += 2*self.inout
-            else:
-                txt = "%d°" % (i*15)
-            s.append('<text x="%.4f" y="%.4f" style="font-size:5px" fill="currentColor" text-anchor="middle" dominant-baseline="middle">%s</text>\n' % (x,y,txt))
+        s.append(SkymapBinder.azimuth_scale(self.inout,tuple(ordinates)))
         if self.show_timestamp:
             # local apparent sidereal time
             sidereal_time = station.lst_hours_at(time_ti)*3600
@@ -1062,7 +1607,7 @@ class SkymapBinder:
             s.append('<text x="97" y="-93" font-size="5" fill="currentColor" text-anchor="end">%s</text>\n' % self.labels['TZ'].get('name(LAST)','sidereal time').capitalize())
             s.append('<text x="97" y="-87" font-size="5" fill="currentColor" text-anchor="end">%s</text>\n' % sd)
             # apparent solar time
-            ha, _, _ = observer.at(time_ti).observe(user.skyfieldalmanac.ephemerides['sun']).apparent().hadec()
+            ha, _, _ = sun_apparent.hadec()
             solar_time = (ha.hours-12.0)*3600
             sd = time.strftime("%H:%M:%S",time.gmtime(solar_time))
             s.append('<text x="-97" y="-93" font-size="5" fill="currentColor" text-anchor="start">%s</text>\n' % self.labels['TZ'].get('name(LAT)','solar time').capitalize())
@@ -1077,22 +1622,7 @@ class SkymapBinder:
             if len(time_s)>1 and time_s[1]:
                 s.append('<text x="97" y="93" font-size="5" fill="currentColor" text-anchor="end">%s</text>\n' % time_s[1])
         if self.show_location:
-            lat_vt = ValueHelper(ValueTuple(abs(almanac_obj.lat),'degree_compass','group_direction'),'current',formatter=almanac_obj.formatter,converter=almanac_obj.converter)
-            lon_vt = ValueHelper(ValueTuple(abs(almanac_obj.lon),'degree_compass','group_direction'),'current',formatter=almanac_obj.formatter,converter=almanac_obj.converter)
-            lat_s = lat_vt.format("%8.4f")
-            lon_s = lon_vt.format("%08.4f")
-            if self.location:
-                s.append('<text x="-97" y="87" font-size="5" fill="currentColor" text-anchor="start">%s</text>\n' % self.location)
-                s.append('<text x="-97" y="92" font-size="3.5" fill="currentColor" text-anchor="start">%s %s, %s %s</text>\n' % (
-                    lat_s.strip(),ordinates[0 if almanac_obj.lat>=0 else 8],
-                    lon_s,ordinates[4 if almanac_obj.lon>=0 else 12]
-                ))
-            else:
-                s.append('<text x="-97" y="87" font-size="5" fill="currentColor" text-anchor="start">%s %s</text>\n' % (
-                    lat_s.replace(' ','&#8199;'), # &numsp;
-                    ordinates[0 if almanac_obj.lat>=0 else 8]))
-                s.append('<text x="-97" y="93" font-size="5" fill="currentColor" text-anchor="start">%s %s</text>\n' % (
-                    lon_s,ordinates[4 if almanac_obj.lon>=0 else 12]))
+            s.append(SkymapBinder.location_text(almanac_obj.lat,almanac_obj.lon,self.location,almanac_obj.formatter,almanac_obj.converter,tuple(ordinates)))
         #s.append(moonphasetest())
         datasource = ['IERS']
         if self.bodies: datasource.append('JPL')
@@ -1135,13 +1665,13 @@ class ZodiacBinder(SkymapBinder):
         # create fictive stars
         zodiac = Star(ra_hours=numpy.array(ZodiacBinder.ZODIAC_RA), dec_degrees=numpy.zeros(len(ZodiacBinder.ZODIAC_RA)), epoch=user.skyfieldalmanac.ts.utc(2010))
         # get actual position
-        apparent = observer.at(time_ti).observe(zodiac).apparent()
+        apparent = self.get_observer_at(observer,time_ti).observe(zodiac).apparent()
         dec, ra, _, _, _ = coord_func(apparent)
         # get image coordinates
         xx, yy = xy_func(dec,ra)
         # print names
         s = ['<g fill="%s" font-size="%s" text-anchor="middle" dominant-baseline="auto">\n' % (color,fontsize,)]
-        for x, nm in zip(xx,user.skyfieldalmanac.ZODIAC):
+        for x, nm in zip(xx.tolist(),user.skyfieldalmanac.ZODIAC):
             s.append('<text x="%.4f" y="%.4f">%s</text>\n' % (x,y0,nm if abbr else self.labels['Constellations'][nm]))
             #s.append('<circle cx="%s" cy="%s" r="1" />\n' % (x,y0))
         s.append('</g>\n')
@@ -1154,8 +1684,8 @@ class ZodiacBinder(SkymapBinder):
         alts = numpy.full(len(azs),0.0)
         alts = Angle(degrees=alts)
         azs = Angle(degrees=azs)
-        station = wgs84.latlon(almanac_obj.lat,almanac_obj.lon,elevation_m=almanac_obj.altitude)
-        apparent = observer.at(time_ti).from_altaz(alt=alts,az=azs)
+        station = get_station(almanac_obj)
+        apparent = self.get_observer_at(observer,time_ti).from_altaz(alt=alts,az=azs)
         ra, dec, _ = apparent.radec()
         xx, yy = xy_func(dec.degrees, ra.hours)
         s = ['<path fill="%s" stroke="%s" stroke-width="0.4" d="M%.4f,%.4f' % (earth_color,horizon_color,xx[0],yy[0])]
@@ -1212,6 +1742,49 @@ class ZodiacBinder(SkymapBinder):
 
         return ''.join(s)
     
+    @staticmethod
+    @functools.lru_cache(maxsize=8)
+    def scales(x0, y0, width, height, y_min, y_max, fontsize, ra_label, dec_label):
+        """ right ascension and declination scale of the zodiac map
+        
+            The scales depend on the size of the image and the language
+            only.
+            
+            Returns:
+                str: SVG elements
+        """
+        x_factor = width/24
+        y_factor = height/(y_min-y_max)
+        # (same as `xy_func()` of `skymap()`)
+        def xy_func(dec, ra):
+            return x0+ra*x_factor,y0+(dec-y_min)*y_factor
+        s = []
+        # grid lines
+        # (The lines are vertical and horizontal. So they are drawn as
+        # one path using the `V` and `H` commands. 2 decimal places are
+        # enough as the coordinates are pixels.)
+        _, y1 = xy_func(y_min,0)
+        _, y2 = xy_func(y_max,0)
+        d = ['M%.2f,%.2fV%.2f' % (xy_func(y_min,i)[0],y1,y2) for i in range(1,24)]
+        x1, _ = xy_func(y_min,0)
+        x2, _ = xy_func(y_min,24)
+        d.extend('M%.2f,%.2fH%.2f' % (x1,xy_func(i,0)[1],x2) for i in range(y_min,y_max+1,10) if y_min<i<y_max)
+        s.append('<path fill="none" stroke="#333" stroke-width="0.2" d="%s" />\n' % ''.join(d))
+        # x scale
+        for i in range(25):
+            x1, _ = xy_func(y_min,i)
+            s.append('<text x="%.2f" y="%.2f" fill="%s" font-size="%s" text-anchor="middle" dominant-baseline="middle">%sh</text>\n' % (
+                x1,y0+fontsize*1.1,'currentColor',fontsize,i))
+        s.append('<text x="%.2f" y="%.2f" fill="%s" font-size="%s" text-anchor="middle" dominant-baseline="middle">%s</text>\n' % (
+            x0+0.5*width,y0+fontsize*2.2,'currentColor',fontsize,ra_label))
+        # y scale
+        for i in range(y_min,y_max+1,10):
+            _, y1 = xy_func(i,0)
+            s.append('<text x="%.2f" y="%.2f" fill="%s" font-size="%s" text-anchor="end" dominant-baseline="middle">%s&#176;</text>\n' % (x0-3,y1,'currentColor',fontsize,i))
+        s.append('<text x="%.2f" y="%.2f" fill="currentColor" font-size="%s" text-anchor="middle" dominant-baseline="middle" transform="rotate(270,%.2f,%.2f)">%s</text>\n' % (
+            x0-3.6*fontsize,y0-0.5*height,fontsize,x0-3.8*fontsize,y0-0.5*height,dec_label))
+        return ''.join(s)
+
     def skymap(self, almanac_obj):
         show_legend = self.show_legend
         # diagram area
@@ -1231,7 +1804,7 @@ class ZodiacBinder(SkymapBinder):
         x_factor = width/24
         y_factor = height/(y_min-y_max)
         # time to present
-        time_ti = user.skyfieldalmanac.timestamp_to_skyfield_time(almanac_obj.time_ts)
+        time_ti = skyfield_time(almanac_obj.time_ts)
         # observer
         observer = SkymapBinder.get_observer(self.almanac_obj)
         # clippath id
@@ -1262,7 +1835,7 @@ class ZodiacBinder(SkymapBinder):
                 timezone_name(self.almanac_obj.time_ts)
             ),
             '<!-- Created using WeeWX and weewx-skymap-almanac extension -->\n',
-            '<defs><clipPath id="%s"><rect x="%s" y="%s" width="%s" height="%s" /></clipPath></defs>\n' % (clippathid,x0+0.2,y0-height+0.2,width-0.4,height-0.4)
+            '<defs><clipPath id="%s"><rect x="%.2f" y="%.2f" width="%.2f" height="%.2f" /></clipPath></defs>\n' % (clippathid,x0+0.2,y0-height+0.2,width-0.4,height-0.4)
         ]
         # background
         if True:
@@ -1271,32 +1844,16 @@ class ZodiacBinder(SkymapBinder):
             constellation_line_color = '#909000'
             zodiac_line_color = '#C000C0'
         background_color = "#%02X%02X%02X" % background_color
-        background_color, moon_background_color, constellation_line_color, horizon_color = self.get_colors(observer, time_ti)
+        # apparent position of the Sun, also used for the background color
+        sun_apparent = apparent_position(observer,time_ti,user.skyfieldalmanac.ephemerides[user.skyfieldalmanac.SUN],almanac_obj.time_ts)
+        background_color, moon_background_color, constellation_line_color, horizon_color = self.get_colors(observer, time_ti, sun_apparent)
         s.append('<rect fill="%s" stroke="currentColor" stroke-width="0.4" x="%s" y="%s" width="%s" height="%s" />\n' % (background_color,x0,y0-height,width,height))
         if self.show_visibility:
             s.append('<g clip-path="url(#%s)" id="horizon">\n' % clippathid)
             s.append(self.draw_visibility_background(almanac_obj,observer,time_ti,xy_func))
             s.append('</g>\n')
-        # x scale
-        for i in range(25):
-            x1, y1 = xy_func(y_min,i)
-            x2, y2 = xy_func(y_max,i)
-            if 0<i<24:
-                s.append('<line x1="%.4f" y1="%.4f" x2="%.4f" y2="%.4f" stroke="%s" stroke-width="0.2" />\n' % (x1,y1,x2,y2,'#333'))
-            s.append('<text x="%.2f" y="%.2f" fill="%s" font-size="%s" text-anchor="middle" dominant-baseline="middle">%sh</text>\n' % (
-                x1,y0+fontsize*1.1,'currentColor',fontsize,i))
-        s.append('<text x="%.2f" y="%.2f" fill="%s" font-size="%s" text-anchor="middle" dominant-baseline="middle">%s</text>\n' % (
-            x0+0.5*width,y0+fontsize*2.2,'currentColor',fontsize,self.get_text('Right ascension')))
-        # y scale
-        for i in range(y_min,y_max+1,10):
-            x1, y1 = xy_func(i,0)
-            x2, y2 = xy_func(i,24)
-            if y_min<i<y_max:
-                s.append('<line x1="%.4f" y1="%.4f" x2="%.4f" y2="%.4f" stroke="%s" stroke-width="0.2" />\n' % (x1,y1,x2,y2,'#333'))
-            s.append('<text x="%.2f" y="%.2f" fill="%s" font-size="%s" text-anchor="end" dominant-baseline="middle">%s&#176;</text>\n' % (x0-3,y1,'currentColor',fontsize,i))
-        txt = self.get_text('Declination')
-        s.append('<text x="%.2f" y="%.2f" fill="currentColor" font-size="%s" text-anchor="middle" dominant-baseline="middle" transform="rotate(270,%.2f,%.2f)">%s</text>\n' % (
-            x0-3.6*fontsize,y0-0.5*height,fontsize,x0-3.8*fontsize,y0-0.5*height,txt))
+        # x and y scale
+        s.append(ZodiacBinder.scales(x0,y0,width,height,y_min,y_max,fontsize,self.get_text('Right ascension'),self.get_text('Declination')))
         # zodiac names
         if True:
             s.append(self.print_zodiac_names(observer, time_ti, coord_func, xy_func, y0-height-0.5*fontsize, 'currentColor', fontsize))
@@ -1320,7 +1877,8 @@ class ZodiacBinder(SkymapBinder):
             self.bodies,
             moon_background_color,
             almanac_obj,
-            1.0
+            1.0,
+            {user.skyfieldalmanac.SUN:sun_apparent}
         ))
         s.append('</g>\n')
         # caption
@@ -1360,13 +1918,13 @@ class MoonSymbolBinder:
         if max_width:
             self.max_width = weeutil.weeutil.to_int(max_width)
         if with_tilt is not None:
-            self.with_tilt = weeutil.weeutil.to_bool(with_tilt)
+            self.with_tilt = to_bool(with_tilt)
         if x is not None: self.x = str(x)
         if y is not None: self.y = str(y)
         if html_class is not None: self.html_class = html_class
         if id is not None: self.id = id
         if colors: self.colors = colors
-        if show_axis is not None: self.show_axis = weeutil.weeutil.to_bool(show_axis)
+        if show_axis is not None: self.show_axis = to_bool(show_axis)
         return self
     
     def __str__(self):
@@ -1375,8 +1933,9 @@ class MoonSymbolBinder:
     def get_moon_tilt(self, time_ti, observer):
         """ calculate moon tilt angle """
         try:
-            alt_moon, az_moon, _ = observer.at(time_ti).observe(user.skyfieldalmanac.ephemerides[user.skyfieldalmanac.EARTHMOON]).apparent().altaz()
-            alt_sun, az_sun, _ = observer.at(time_ti).observe(user.skyfieldalmanac.ephemerides[user.skyfieldalmanac.SUN]).apparent().altaz()
+            time_ts = self.almanac_obj.time_ts
+            alt_moon, az_moon, _ = apparent_position(observer,time_ti,user.skyfieldalmanac.ephemerides[user.skyfieldalmanac.EARTHMOON],time_ts).altaz()
+            alt_sun, az_sun, _ = apparent_position(observer,time_ti,user.skyfieldalmanac.ephemerides[user.skyfieldalmanac.SUN],time_ts).altaz()
             alpha = user.skyfieldalmanac.moon_tilt(
                alt_moon.radians,alt_sun.radians,az_moon.radians-az_sun.radians)
         except (LookupError,TypeError,ValueError,ArithmeticError) as e:
@@ -1388,7 +1947,12 @@ class MoonSymbolBinder:
         """ calculate libration """
         try:
             frame = user.skyfieldalmanac.frames[user.skyfieldalmanac.EARTHMOON]
-            p = (observer-user.skyfieldalmanac.ephemerides[user.skyfieldalmanac.EARTHMOON]).at(time_ti)
+            # position of the observer relative to the Moon
+            # (the same as `(observer-moon).at(time_ti)`, but re-using
+            # the position of the observer calculated for the tilt angle)
+            p = ICRF(
+                observer_position(observer,time_ti).position.au-user.skyfieldalmanac.ephemerides[user.skyfieldalmanac.EARTHMOON].at(time_ti).position.au,
+                t=time_ti)
             lat, lon, dist = p.frame_latlon(frame)
             lon_degrees = (lon.degrees + 180.0) % 360.0 - 180.0
             return lat.degrees, lon_degrees, dist.km
@@ -1398,30 +1962,33 @@ class MoonSymbolBinder:
 
     def moon_symbol(self):
         """ create an SVG image of the moon showing her phases """
-        time_ti = user.skyfieldalmanac.timestamp_to_skyfield_time(self.almanac_obj.time_ts)
-        earth = user.skyfieldalmanac.ephemerides[user.skyfieldalmanac.EARTH]
-        observer = earth + wgs84.latlon(self.almanac_obj.lat,self.almanac_obj.lon,elevation_m=self.almanac_obj.altitude)
+        time_ti = skyfield_time(self.almanac_obj.time_ts)
+        observer = get_observer(self.almanac_obj)
         alpha = self.get_moon_tilt(time_ti, observer) if self.with_tilt else None
-        phase = skyfield.almanac.moon_phase(user.skyfieldalmanac.ephemerides,time_ti)
+        phase = moon_phase(self.almanac_obj)
         lat, lon, dist = self.get_libration(time_ti, observer)
         axis = user.skyfieldalmanac.get_axis(time_ti, observer, user.skyfieldalmanac.EARTHMOON)
         # tooltip
         moon_index = int((phase.degrees/360.0 * 8) + 0.5) & 7
         ptext = self.almanac_obj.moon_phases[moon_index]
-        txt = self.heavenly_body_name.capitalize()
-        txt += '\n%s: %.0f&#176; %s' % (self.labels.get('Phase','Phase').capitalize(),phase.degrees,ptext)
+        txt = [self.heavenly_body_name.capitalize()]
+        txt.append('\n%s: %.0f&#176; %s' % (self.labels.get('Phase','Phase').capitalize(),phase.degrees,ptext))
         if alpha is not None:
-            txt += '\n%s: %.0f&#176;' % (self.labels.get('Moon tilt','Tilt'),alpha*180.0/numpy.pi)
+            txt.append('\n%s: %.0f&#176;' % (self.labels.get('Moon tilt','Tilt'),math.degrees(alpha)))
         if lat is not None and lon is not None:
-            txt += '\n%s: %.3f&#176; %.3f&#176;' % (self.labels.get('Libration','Libration'),lat,lon)
+            txt.append('\n%s: %.3f&#176; %.3f&#176;' % (self.labels.get('Libration','Libration'),lat,lon))
         # axis of the selenographic coordinates
         if axis is not None and self.show_axis and alpha is not None:
-            txt += '\n%s: %.1f&#176;' % (self.labels.get('Axis','Axis'),axis.degrees)
+            txt.append('\n%s: %.1f&#176;' % (self.labels.get('Axis','Axis'),axis.degrees))
+            # (The line is symmetric to the center. So sine and cosine are
+            # required once only.)
+            x1 = 110*math.sin(axis.radians)
+            y1 = 110*math.cos(axis.radians)
             axis_line = '<line x1="%.4f" y1="%.4f" x2="%.4f" y2="%.4f" stroke="%s" stroke-opacity="0.75" stroke-width="4" stroke-dasharray="20 6 4 6" />' % (
-                110*numpy.sin(axis.radians),
-                110*numpy.cos(axis.radians),
-                -110*numpy.sin(axis.radians),
-                -110*numpy.cos(axis.radians),
+                x1,
+                y1,
+                -x1,
+                -y1,
                 '#da6d5e' if len(self.colors)<3 else self.colors[2]
             )
         else:
@@ -1482,7 +2049,7 @@ class MoonSymbolBinder:
             '<desc>the Moon, phase %.1f&#176;</desc>\n' % phase.degrees,
             '<!-- Created using WeeWX, weewx-skymap-almanac extension, and Skyfield -->\n',
             pattern,
-            moon('moon', txt, 0, 0, 100, None, colors, None, phase,'moon',alpha),
+            moon('moon', ''.join(txt), 0, 0, 100, None, colors, None, phase,'moon',alpha),
             axis_line,
             SkymapAlmanacType.SVG_END
         ))
@@ -1540,7 +2107,7 @@ class AnalemmaBinder:
                     val = weeutil.weeutil.to_int(val)
                 setattr(self,key,val)
             elif key in {'show_timestamp','show_location'}:
-                setattr(self,key,weeutil.weeutil.to_bool(kwargs[key]))
+                setattr(self,key,to_bool(kwargs[key]))
             else:
                 setattr(self,key,kwargs[key])
         return self
@@ -1568,12 +2135,14 @@ class AnalemmaBinder:
         # time of day
         hms = (self.almanac_obj.time_ts-year[0])%86400
         # convert to Skyfield time
-        time_ti = user.skyfieldalmanac.timestamp_to_skyfield_time(year[0]+hms)
-        t0 = user.skyfieldalmanac.timestamp_to_skyfield_time(year[0])
-        t1 = user.skyfieldalmanac.timestamp_to_skyfield_time(year[1])
+        # (The time objects are cached, so diagrams of the same year and
+        # time of day share them.)
+        time_ti = skyfield_time(year[0]+hms)
+        t0 = skyfield_time(year[0])
+        t1 = skyfield_time(year[1])
         logdbg("analemma year=(%s,%s) ti=%s" % (t0,t1,time_ti))
         # list of the days of a year
-        days = user.skyfieldalmanac.ts.ut1_jd([time_ti.ut1+i for i in range(365)])
+        days = days_of_year(time_ti)
         # location
         observer, horizon, body = user.skyfieldalmanac._get_observer(self.almanac_obj,user.skyfieldalmanac.SUN,False)
         # Sun's positions
@@ -1610,11 +2179,13 @@ class AnalemmaBinder:
         max_az = numpy.ceil(max_az/xscale)*xscale
         logdbg("analemma min_alt=%s max_alt=%s min_az=%s max_az=%s" % (min_alt,max_alt,min_az,max_az))
         # Seasons
-        t_season, k_season = skyfield.almanac.find_discrete(t0,t1,skyfield.almanac.seasons(user.skyfieldalmanac.sun_and_planets))
-        t = user.skyfieldalmanac.ts.ut1_jd(numpy.round(t_season.ut1-time_ti.ut1,0)+time_ti.ut1)
-        alt_season, az_season, _ = observer.at(t).observe(body).apparent().altaz()
-        az_season = az_season.degrees
-        if midnight: az_season = numpy.where(az_season>180.0,az_season-360.0,az_season)
+        t_season, k_season = seasons(user.skyfieldalmanac.sun_and_planets,t0,t1)
+        # (The positions at the time of day on the days of the seasons
+        # are part of the positions calculated above. So they are taken
+        # from there instead of observing the Sun again.)
+        idx = numpy.clip(numpy.round(t_season.ut1-time_ti.ut1,0).astype(int),0,len(azs)-1)
+        alt_season = alts.degrees[idx]
+        az_season = azs[idx]
         logdbg("analemma seasons %s" % t_season)
         logdbg("analemma seasons alt %s" % alt_season)
         logdbg("analemma seasons az %s" % az_season)
@@ -1623,7 +2194,7 @@ class AnalemmaBinder:
         y_factor = height/(min_alt-max_alt)
         ys = (alts.degrees-min_alt)*y_factor+y0
         xs = (azs-min_az)*x_factor+x0
-        y_season = (alt_season.degrees-min_alt)*y_factor+y0
+        y_season = (alt_season-min_alt)*y_factor+y0
         x_season = (az_season-min_az)*x_factor+x0
         s = []
         # SVG header
@@ -1648,27 +2219,31 @@ class AnalemmaBinder:
         s.append('<!-- Created using WeeWX and weewx-skymap-almanac extension -->\n')
         s.append('<rect x="%s" y="%s" width="%s" height="%s" stroke="%s" stroke-width="1" fill="none" />\n' % (
             x0,y0-height,width,height,self.colors[0]))
+        # positions of the ticks of both the scales
+        # (calculated as arrays and converted to Python floats at once)
+        y_ticks = range(int(min_alt),int(max_alt)+yscale,yscale)
+        ys_ticks = ((numpy.array(y_ticks)-min_alt)*y_factor+y0).tolist()
+        x_ticks = range(int(min_az),int(max_az)+xscale,xscale)
+        xs_ticks = ((numpy.array(x_ticks)-min_az)*x_factor+x0).tolist()
+        # grid lines
+        # (The lines are vertical and horizontal. So they are drawn as
+        # one path using the `H` and `V` commands.)
+        d = ['M%.2f,%.2fH%.2f' % (x0,y,x0+width) for i, y in zip(y_ticks,ys_ticks) if int(min_alt)<i<int(max_alt)]
+        d.extend(['M%.2f,%.2fV%.2f' % (x,y0,y0-height) for x in xs_ticks])
+        s.append('<path fill="none" stroke="%s" d="%s" />\n' % (self.colors[1],''.join(d)))
         # y scale
-        for i in range(int(min_alt),int(max_alt)+yscale,yscale):
-            y = (i-min_alt)*y_factor+y0
-            if int(min_alt)<i<int(max_alt):
-                s.append('<line x1="%.2f" y1="%.2f" x2="%.2f" y2="%.2f" stroke="%s" />\n' % (x0,y,x0+width,y,self.colors[1]))
-            s.append('<text x="%.2f" y="%.2f" fill="%s" font-size="%s" text-anchor="end" dominant-baseline="middle">%s&#176;</text>\n' % (x0-3,y,self.colors[0],fontsize,i))
+        s.extend(['<text x="%.2f" y="%.2f" fill="%s" font-size="%s" text-anchor="end" dominant-baseline="middle">%s&#176;</text>\n' % (x0-3,y,self.colors[0],fontsize,i) for i, y in zip(y_ticks,ys_ticks)])
         s.append('<text x="%.2f" y="%.2f" fill="currentColor" font-size="%s" text-anchor="middle" dominant-baseline="middle" transform="rotate(270,%.2f,%.2f)">%s</text>\n' % (
             x0-2.3*fontsize,y0-0.5*height,fontsize,x0-2.3*fontsize,y0-0.5*height,self.y_axis_label))
         # x scale
-        for i in range(int(min_az),int(max_az)+xscale,xscale):
-            x = (i-min_az)*x_factor+x0
-            s.append('<line x1="%.2f" y1="%.2f" x2="%.2f" y2="%.2f" stroke="%s" />\n' % (x,y0,x,y0-height,self.colors[1]))
-            s.append('<text x="%.2f" y="%.2f" fill="%s" font-size="%s" text-anchor="middle" dominant-baseline="middle">%s&#176;</text>\n' % (
-                x,y0+fontsize*1.1,self.colors[0],fontsize,i%360))
+        s.extend(['<text x="%.2f" y="%.2f" fill="%s" font-size="%s" text-anchor="middle" dominant-baseline="middle">%s&#176;</text>\n' % (
+                x,y0+fontsize*1.1,self.colors[0],fontsize,i%360) for i, x in zip(x_ticks,xs_ticks)])
         s.append('<text x="%.2f" y="%.2f" fill="%s" font-size="%s" text-anchor="middle" dominant-baseline="middle">%s</text>\n' % (
             x0+0.5*width,y0+fontsize*2.2,self.colors[0],fontsize,self.x_axis_label))
         # analemma
-        s.append('<path stroke="%s" stroke-width="2" fill="none" d="M%s,%s' % (self.colors[2],xs[0],ys[0]))
-        for x,y in zip(xs,ys):
-            s.append('L%.2f,%.2f' % (x,y))
-        s.append('z" />\n')
+        xs, ys = xs.tolist(), ys.tolist()
+        s.append('<path stroke="%s" stroke-width="2" fill="none" d="M%.2f,%.2f%sz" />\n' % (
+            self.colors[2],xs[0],ys[0],''.join(['L%.2f,%.2f' % xy for xy in zip(xs[1:],ys[1:])])))
         # seasons
         format = self.time_format_without_year()
         r = fontsize/3
@@ -1755,10 +2330,8 @@ class AnalemmaBinder:
                 txt = "%s%s" % (txt,self.location)
             else:
                 # location described by geographic coordinates
-                lat_vt = ValueHelper(ValueTuple(abs(self.almanac_obj.lat),'degree_compass','group_direction'),'current',formatter=formatter,converter=self.almanac_obj.converter)
-                lon_vt = ValueHelper(ValueTuple(abs(self.almanac_obj.lon),'degree_compass','group_direction'),'current',formatter=formatter,converter=self.almanac_obj.converter)
-                lat_s = lat_vt.format("%.4f").replace(' ','&#8199;') # &numsp;
-                lon_s = lon_vt.format("%08.4f")
+                lat_s, lon_s = latlon_strings(self.almanac_obj.lat,self.almanac_obj.lon,formatter,self.almanac_obj.converter)
+                lat_s = lat_s.strip().replace(' ','&#8199;') # &numsp;
                 txt = "%s%s&#8201;%s, %s&#8201;%s" % (
                     txt,
                     lat_s,
@@ -1888,8 +2461,10 @@ class LibrationDiagramBinder(AnalemmaBinder):
             lons_phases = (lons_phases.degrees+180.0)%360.0-180.0
             ys_phases = (lats_phases-min_lat)*y_factor+y0
             xs_phases = (lons_phases-min_lon)*x_factor+x0
-            a_phases = numpy.arctan2(lats_phases,lons_phases)
-            a = numpy.sqrt(lats_phases*lats_phases+lons_phases*lons_phases)
+            # distance from the center and direction of the libration
+            # at the moon phases (as polar coordinates, the direction
+            # is calculated once only)
+            a = numpy.hypot(lats_phases,lons_phases)
             #loginf('%s' % a)
             rxt = numpy.abs(a*x_factor)-fontsize*3
             ryt = numpy.abs(a*y_factor)-fontsize*1.5
@@ -2029,7 +2604,7 @@ class EquationOfTimeBinder:
             if key in {'width','height'}:
                 setattr(self,key,weeutil.weeutil.to_int(kwargs[key]))
             elif key in {'noon','show_today','show_legend'}:
-                setattr(self,key,weeutil.weeutil.to_bool(kwargs[key]))
+                setattr(self,key,to_bool(kwargs[key]))
             else:
                 setattr(self,key,kwargs[key])
         return self
@@ -2163,7 +2738,7 @@ class EquationOfTimeBinder:
                  time_ti.dut1
              ),
              '<!-- Created using WeeWX and weewx-skymap-almanac extension -->\n',
-             '<defs><clipPath id="%s"><rect x="%s" y="%s" width="%s" height="%s" /></clipPath></defs>\n' % (clippathid,x0+0.5,y0-height+0.5,width-1.0,height-1.0)
+             '<defs><clipPath id="%s"><rect x="%.2f" y="%.2f" width="%.2f" height="%.2f" /></clipPath></defs>\n' % (clippathid,x0+0.5,y0-height+0.5,width-1.0,height-1.0)
         ]
         if sunrise_transit_sunset and numpy.nanmin(tsh)>=numpy.nanmax(trh):
             s.append('<path stroke="none" fill="yellow" opacity="0.1" d="')
@@ -2317,15 +2892,18 @@ class EquationOfTimeBinder:
 
 
 def moon(id, txt, x, y, r, distance, col, radius, phase, short_label, shape):
-    """ create SVG image of the moon showing her phase """
+    """ create SVG image of the moon showing her phase
+    
+        All the values are scalars. So `math` is used instead of `numpy`.
+    """
     id = ' id="%s"' % id if id else ''
-    fullness = numpy.cos(phase.radians)
+    fullness = math.cos(phase.radians)
     phase = round(phase.degrees,1)%360
     full_moon = phase==180.0
     new_moon = phase==0.0
     # moon tilt and waxing/waning
     if shape is None or isinstance(shape, str):
-        alpha = numpy.pi if phase>180.0 else 0.0
+        alpha = math.pi if phase>180.0 else 0.0
     else:
         alpha = shape
     # color
@@ -2347,36 +2925,27 @@ def moon(id, txt, x, y, r, distance, col, radius, phase, short_label, shape):
         circle_opacity = 1
     s = []
     s.append('<g%s><title>%s</title>\n' % (id,txt))
-    s.append('<circle cx="%.4f" cy="%.4f" r="%s" fill="%s" opacity="%s" stroke="none" />\n' % (x,y,r,circle_color,circle_opacity))
+    s.append('<circle cx="%.4f" cy="%.4f" r="%.4f" fill="%s" opacity="%s" stroke="none" />\n' % (x,y,r,circle_color,circle_opacity))
     if not full_moon and not new_moon:
-        xr = -r*numpy.sin(alpha)
-        yr = r*numpy.cos(alpha)
+        xr = -r*math.sin(alpha)
+        yr = r*math.cos(alpha)
         #loginf('alpha=%s xr=%s yr=%s' % (alpha,xr,yr))
         s.append('<path fill="%s" stroke="none" d="M%.4f,%.4fa%.4f,%.4f 0 0 %s %.4f,%.4f' % (col[1],x+xr,y-yr,r,r,1,-2*xr,2*yr))
         if phase!=90.0 and phase!=270.0:
             quarter = 0 if fullness>=0.0 else 1
-            fullness = numpy.abs(fullness)
-            s.append('a%.4f,%.4f %.4f 0 %s %.4f,%.4f' % (fullness*r,r,-alpha*180.0/numpy.pi,quarter,2*xr,-2*yr))
+            fullness = abs(fullness)
+            s.append('a%.4f,%.4f %.4f 0 %s %.4f,%.4f' % (fullness*r,r,-math.degrees(alpha),quarter,2*xr,-2*yr))
         s.append('z" />\n')
     s.append('</g>\n')
     return ''.join(s)
 
 def moonphasetest():
     """ test moon phases in the moon symbol """
-    s = ""
-    s+=moon(None,'30',-50,90,10,None,['rgba(255,243,228,0.3)','#ffecd5'],0,skyfield.units.Angle(degrees=30),'',None)
-    s+=moon(None,'60',-30,90,10,None,['rgba(255,243,228,0.3)','#ffecd5'],0,skyfield.units.Angle(degrees=60),'',None)
-    s+=moon(None,'90',-10,90,10,None,['rgba(255,243,228,0.3)','#ffecd5'],0,skyfield.units.Angle(degrees=90),'',None)
-    s+=moon(None,'120',10,90,10,None,['rgba(255,243,228,0.3)','#ffecd5'],0,skyfield.units.Angle(degrees=120),'',None)
-    s+=moon(None,'150',30,90,10,None,['rgba(255,243,228,0.3)','#ffecd5'],0,skyfield.units.Angle(degrees=150),'',None)
-    s+=moon(None,'180',50,90,10,None,['rgba(255,243,228,0.3)','#ffecd5'],0,skyfield.units.Angle(degrees=180),'',None)
-    s+=moon(None,'210',-50,-90,10,None,['rgba(255,243,228,0.3)','#ffecd5'],0,skyfield.units.Angle(degrees=210),'',None)
-    s+=moon(None,'240',-30,-90,10,None,['rgba(255,243,228,0.3)','#ffecd5'],0,skyfield.units.Angle(degrees=240),'',None)
-    s+=moon(None,'270',-10,-90,10,None,['rgba(255,243,228,0.3)','#ffecd5'],0,skyfield.units.Angle(degrees=270),'',None)
-    s+=moon(None,'300',10,-90,10,None,['rgba(255,243,228,0.3)','#ffecd5'],0,skyfield.units.Angle(degrees=300),'',None)
-    s+=moon(None,'330',30,-90,10,None,['rgba(255,243,228,0.3)','#ffecd5'],0,skyfield.units.Angle(degrees=330),'',None)
-    s+=moon(None,'360',50,-90,10,None,['rgba(255,243,228,0.3)','#ffecd5'],0,skyfield.units.Angle(degrees=360),'',None)
-    return s
+    s = []
+    for i in range(12):
+        phase = 30*(i+1)
+        s.append(moon(None,'%s' % phase,-50+20*(i%6),90 if i<6 else -90,10,None,['rgba(255,243,228,0.3)','#ffecd5'],0,skyfield.units.Angle(degrees=phase),'',None))
+    return ''.join(s)
 
 
 class SkymapService(StdService):
@@ -2412,17 +2981,13 @@ class SkymapService(StdService):
         """ remove this extension from the almanacs list
         """
         try:
-            # find the Skymap almanac in the list of almanacs
-            idx = weewx.alamanc.almanacs.index(self.skymap_almanac)
-            # remove it from the list
-            del weewx.almanac.almanacs[idx]
+            # remove the Skymap almanac from the list of almanacs
+            weewx.almanac.almanacs.remove(self.skymap_almanac)
         except ValueError:
             pass
         try:
-            # finde the Skymap sub-almanac in the list of almanacs
-            idx = user.skyfieldalmanac.subalmanacs.index(self.skymap_subalamanac)
-            # remove it from the list
-            del user.skyfieldalmanac.subalmanacs[idx]
+            # remove the Skymap sub-almanac from the list of sub-almanacs
+            user.skyfieldalmanac.subalmanacs.remove(self.skymap_subalmanac)
         except ValueError:
             pass
         # stop thread